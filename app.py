@@ -1,38 +1,130 @@
-﻿from flask import Flask, jsonify, request, url_for, render_template, redirect, send_file
+﻿from flask import Flask, jsonify, request, url_for, render_template, redirect, send_file, Response, stream_with_context, g
 from flask_login import current_user, LoginManager
 from datetime import datetime, timedelta
+import json
+import math
+import os
+import shutil
+import socket
+import time
 import uuid
 import base64
+import hmac
 from io import BytesIO
+from functools import wraps
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits import parse_many
 from flask_wtf.csrf import CSRFProtect
 from flask_sqlalchemy import SQLAlchemy
 from whitenoise import WhiteNoise
+from render_cache import RenderCache, make_render_key
+from render_store import RenderStore
+from symbology import symbologies
+from render_farm import create_render_farm
+from urllib.parse import quote
+from db_config import database_uri, engine_options, ensure_schema, install_sqlite_pragmas
+from write_queue import GroupCommitWriter
+from rate_limit_storage import default_storage_uri
+from request_schema import RequestSchema, Field, text, integer, boolean, request_body
+from json_provider import json_provider_class
+from instrumentation import Instrumentation, stage, log_sampled
+from sequence_planner import SequenceSpec, validate_value
+from zip_stream import stream_zip, compress_id_ranges, expand_id_ranges
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+import click
+import multiprocessing
+from sqlalchemy import event, insert, tuple_, and_, or_, func, inspect as inspect_schema
+from sqlalchemy.orm import make_transient_to_detached
+from cachetools import TTLCache
+import threading
 
 # Initialize Flask app
 app = Flask(__name__)
+# 'orjson' (used when installed) or 'default' for Flask's json-module provider
+app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'orjson')
+app.json = json_provider_class(app.config['JSON_PROVIDER'])(app)
 app.config['SECRET_KEY'] = 'your-secret-key'  # Replace with your actual secret key
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///barcode_v2.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+# WAL-friendly pool settings; the PRAGMAs themselves are applied per connection below
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Memory ceiling for the in-process render cache (0 disables it)
+app.config['RENDER_CACHE_MAX_BYTES'] = int(os.environ.get('RENDER_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# zlib level for QR PNGs encoded directly from the module matrix (0-9)
+app.config['QR_PNG_COMPRESS_LEVEL'] = int(os.environ.get('QR_PNG_COMPRESS_LEVEL', 9))
+# Render worker processes for bulk sequences (defaults to one per core, 1 disables the pool)
+app.config['RENDER_FARM_WORKERS'] = int(os.environ.get('RENDER_FARM_WORKERS', os.cpu_count() or 1))
+# Batches smaller than this are rendered inline rather than shipped to the pool
+app.config['RENDER_FARM_MIN_ITEMS'] = int(os.environ.get('RENDER_FARM_MIN_ITEMS', 64))
+# Serverless handlers turn this off so cold starts skip loading the render libraries
+app.config['RENDER_WARM_ON_IMPORT'] = os.environ.get('RENDER_WARM_ON_IMPORT', 'true').lower() == 'true'
+# Where rendered images of saved barcodes are kept between requests
+app.config['RENDER_STORE_DIR'] = os.environ.get('RENDER_STORE_DIR', os.path.join(app.instance_path, 'renders'))
+# Where background bulk jobs write their rendered images and result manifests
+app.config['JOBS_DIR'] = os.environ.get('JOBS_DIR', os.path.join(app.instance_path, 'jobs'))
+# A running job whose worker hasn't reported progress for this long is handed to another worker
+app.config['JOB_LEASE_SECONDS'] = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+# Finished jobs and their artifacts are removed by prune-render-store after this many days
+app.config['JOB_ARTIFACT_MAX_AGE_DAYS'] = float(os.environ.get('JOB_ARTIFACT_MAX_AGE_DAYS', 7))
+
+# How long a loaded user is reused before it is read from the database again
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 30))
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 10000))
+# Route barcode inserts through one group-committing writer thread per process
+app.config['DB_GROUP_COMMIT'] = os.environ.get('DB_GROUP_COMMIT', 'true').lower() == 'true'
+# Rate-limit counters every worker shares: sqlite:///file for one host, fastpath+redis://host for several
+app.config['RATELIMIT_STORAGE_URI'] = os.environ.get('RATELIMIT_STORAGE_URI') or default_storage_uri(app.instance_path)
+app.config['RATELIMIT_STRATEGY'] = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+# Limits for routes that don't set their own
+app.config['RATELIMIT_DEFAULT'] = os.environ.get('RATELIMIT_DEFAULT', '200 per day, 50 per hour')
+# Share of requests whose verbose log lines are written (0 silences them, 1 logs every request)
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+# Bearer token Prometheus sends to read /metrics; without it only admins can
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
 
 # Wrap app with WhiteNoise, pointing to the 'static' directory
 app.wsgi_app = WhiteNoise(app.wsgi_app, root='static/', prefix='static/')
 
 # Initialize extensions
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(db.engine)
+    db_writer = GroupCommitWriter(db.engine) if app.config['DB_GROUP_COMMIT'] else None
 csrf = CSRFProtect(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+# Per-stage timings for Server-Timing headers and /metrics; set up before the
+# limiter so its checks count towards the request total
+instrumentation = Instrumentation(app)
+
 # Initialize rate limiter
 limiter = Limiter(
     get_remote_address,
     app=app,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",  # For production, change to "redis://localhost:6379/0"
-    storage_options={"client": "memory"},  # For production, remove this line when using Redis
-    strategy="fixed-window"  # More efficient for high traffic
+    default_limits=[app.config['RATELIMIT_DEFAULT']],
+    storage_uri=app.config['RATELIMIT_STORAGE_URI'],
+    strategy=app.config['RATELIMIT_STRATEGY'],
+    # Keep limiting per worker if the shared storage becomes unreachable
+    in_memory_fallback_enabled=True
+)
+
+# Cache of rendered images shared by every request in this worker
+render_cache = RenderCache(max_bytes=app.config['RENDER_CACHE_MAX_BYTES'])
+
+# Saved barcodes are immutable, so their images are rendered once and served from disk
+render_store = RenderStore(app.config['RENDER_STORE_DIR'])
+
+# Load fonts and writer state once per worker instead of on every render
+symbologies.png_compress_level = app.config['QR_PNG_COMPRESS_LEVEL']
+if app.config['RENDER_WARM_ON_IMPORT']:
+    symbologies.warm()
+
+# Worker processes are only started the first time a large batch needs them
+render_farm = create_render_farm(
+    workers=app.config['RENDER_FARM_WORKERS'],
+    min_items=app.config['RENDER_FARM_MIN_ITEMS']
 )
 
 # Define models
@@ -47,6 +139,12 @@ class Barcode(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     unique_id = db.Column(db.String(36), default=lambda: str(uuid.uuid4()), unique=True)
     
+    # Newest-first listings page through these as index range scans
+    __table_args__ = (
+        db.Index('ix_barcode_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_barcode_user_type_created', 'user_id', 'barcode_type', 'created_at', 'id'),
+    )
+    
     def __init__(self, data, barcode_type, filename, is_dynamic=False, redirect_url=None, user_id=None):
         self.data = data
         self.barcode_type = barcode_type
@@ -64,6 +162,65 @@ class Barcode(db.Model):
         # Store metadata
         pass
 
+@event.listens_for(Barcode, 'after_delete')
+def remove_stored_renders(mapper, connection, target):
+    # A rolled-back delete only costs a re-render on the next fetch
+    try:
+        render_store.delete(target.unique_id)
+    except OSError as e:
+        app.logger.warning(f"Could not remove stored renders for {target.unique_id}: {str(e)}")
+
+@event.listens_for(Barcode, 'after_delete')
+def unlink_sequence_member(mapper, connection, target):
+    # In the same transaction as the delete; the member is rendered from its range again
+    if connection.dialect.has_table(connection, 'barcode_sequence_member'):
+        connection.execute(
+            BarcodeSequenceMember.__table__.delete().where(BarcodeSequenceMember.barcode_id == target.id)
+        )
+
+# Rows written per INSERT statement and transaction by bulk saves
+BARCODE_INSERT_CHUNK_SIZE = 1000
+
+def bulk_unique_ids(count):
+    """Return count random version-4 UUID strings from a single urandom call."""
+    entropy = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=entropy[offset:offset + 16], version=4)) for offset in range(0, 16 * count, 16)]
+
+def prepare_barcode_rows(rows, user_id=None):
+    """Fill in the columns insert_barcode_rows doesn't take from the caller."""
+    created_at = datetime.utcnow()
+    for row, unique_id in zip(rows, bulk_unique_ids(len(rows))):
+        row.setdefault('is_dynamic', False)
+        row.setdefault('redirect_url', None)
+        row['user_id'] = user_id
+        row['created_at'] = created_at
+        row['unique_id'] = unique_id
+    return rows
+
+def barcode_insert_statement():
+    # Batched INSERT ... RETURNING, with ids matched back to the parameter order
+    return insert(Barcode).returning(Barcode.id, sort_by_parameter_order=True)
+
+def insert_barcode_rows(rows, user_id=None):
+    """Insert and commit barcode rows, returning their ids in input order.
+    
+    rows are dicts with data, barcode_type and filename. This bypasses the ORM
+    unit of work, so no Barcode objects are built or tracked. With group
+    commit enabled the insert shares a transaction with other requests' writes.
+    """
+    if not rows:
+        return []
+    
+    prepare_barcode_rows(rows, user_id)
+    statement = barcode_insert_statement()
+    with stage('db_write'):
+        if db_writer is not None:
+            return db_writer.execute(statement, rows)
+        
+        barcode_ids = db.session.execute(statement, rows).scalars().all()
+        db.session.commit()
+    return barcode_ids
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -77,56 +234,327 @@ class User(db.Model):
         self.encryption_key = str(uuid.uuid4())
         return self.encryption_key
 
+class BulkJob(db.Model):
+    """A bulk sequence generation queued for the background job workers."""
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, completed, failed
+    params = db.Column(db.Text, nullable=False)  # JSON-encoded request parameters
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Text, nullable=True)  # JSON-encoded list of failed items
+    error = db.Column(db.Text, nullable=True)
+    worker = db.Column(db.String(128), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    # The worker's lease; renewed each time it records progress
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class BarcodeSequence(db.Model):
+    """A saved sequence stored as its range instead of one Barcode row per member."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    barcode_type = db.Column(db.String(50), nullable=False)
+    prefix = db.Column(db.String(255), nullable=False, default='')
+    start = db.Column(db.Integer, nullable=False, default=1)
+    count = db.Column(db.Integer, nullable=False)
+    pad_length = db.Column(db.Integer, nullable=False, default=0)
+    suffix = db.Column(db.String(255), nullable=False, default='')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    unique_id = db.Column(db.String(36), default=lambda: str(uuid.uuid4()), unique=True)
+    
+    def spec(self):
+        return SequenceSpec(self.prefix, self.start, self.count, self.pad_length, self.suffix, self.barcode_type)
+    
+    def member_data(self, index):
+        return self.spec()[index]
+    
+    def member(self, index):
+        """Return an unsaved Barcode standing in for one member of the sequence."""
+        barcode = Barcode(
+            data=self.member_data(index),
+            barcode_type=self.barcode_type,
+            filename=f"{self.barcode_type}_sequence{self.id}_{index}.png",
+            user_id=self.user_id
+        )
+        # Stored renders of every member share the sequence's unique id as a prefix
+        barcode.unique_id = f"{self.unique_id}-{index}"
+        return barcode
+
+class BarcodeSequenceMember(db.Model):
+    """A sequence member that was materialized into its own Barcode row."""
+    sequence_id = db.Column(db.Integer, db.ForeignKey('barcode_sequence.id'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    barcode_id = db.Column(db.Integer, db.ForeignKey('barcode.id'), nullable=False)
+
+# Column values of recently loaded users, keyed by id; TTLCache is not thread-safe on its own
+user_cache = TTLCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+user_cache_lock = threading.Lock()
+
+def invalidate_cached_user(user_id):
+    """Drop a user from this worker's cache so the next request reads it from the database."""
+    with user_cache_lock:
+        user_cache.pop(user_id, None)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def user_changed(mapper, connection, target):
+    # Premium status, encryption key and the rest are re-read on the next request
+    invalidate_cached_user(target.id)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    with user_cache_lock:
+        snapshot = user_cache.get(user_id)
+    
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            with user_cache_lock:
+                user_cache[user_id] = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        return user
+    
+    # Rebuild the row and attach it to this request's session without a SELECT
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+# Requests allowed per tier of caller
+RATE_LIMIT_TIERS = {
+    'premium': "1000 per day, 100 per hour",
+    'registered': "500 per day, 50 per hour",
+    'anonymous': "100 per day, 20 per hour"
+}
+
+def resolve_rate_limit_tier():
+    if hasattr(current_user, 'is_authenticated') and current_user.is_authenticated:
+        if hasattr(current_user, 'is_premium') and current_user.is_premium:
+            return 'premium'
+        return 'registered'
+    return 'anonymous'
+
+def request_rate_limit_tier():
+    # Resolved once per request and shared by every limit checked on it
+    tier = g.get('rate_limit_tier')
+    if tier is None:
+        tier = g.rate_limit_tier = resolve_rate_limit_tier()
+    return tier
 
 # Import utility functions
 def get_user_rate_limits(action_type):
     # Define rate limits based on user authentication status
-    if hasattr(current_user, 'is_authenticated') and current_user.is_authenticated:
-        if hasattr(current_user, 'is_premium') and current_user.is_premium:
-            return "1000 per day, 100 per hour"
-        return "500 per day, 50 per hour"
-    return "100 per day, 20 per hour"
+    return RATE_LIMIT_TIERS[request_rate_limit_tier()]
+
+# Render budgets in render units (one unit is about one Code128 PNG), shared by every render endpoint
+RENDER_BUDGETS = {
+    'premium': "200000 per day, 20000 per hour",
+    'registered': "50000 per day, 5000 per hour",
+    'anonymous': "10000 per day, 1000 per hour"
+}
+
+# Largest cost one request may have: the tier's smallest window. A larger
+# request could never be paid for, so it is refused instead
+RENDER_MAX_COSTS = {tier: min(item.amount for item in parse_many(budget)) for tier, budget in RENDER_BUDGETS.items()}
+
+# Most members one request to each sequence endpoint may produce
+SEQUENCE_PAGE_LIMITS = {
+    'generate_sequence': 1000,
+    'generate_bulk_sequence': 5000
+}
+
+def render_budget():
+    return RENDER_BUDGETS[request_rate_limit_tier()]
+
+def render_request_cost():
+    """Render units charged to the render budget for this request.
+    
+    A request costing more than the tier's smallest budget window is only
+    charged one unit, since within_render_window refuses it anyway.
+    """
+    cost = request_render_cost()
+    return cost if cost <= RENDER_MAX_COSTS[request_rate_limit_tier()] else 1
+
+def request_render_cost():
+    """Render units this request costs: items times the symbology's cost factor.
+    
+    Requests the endpoint will reject anyway, and sequences saved as a
+    range (which render nothing up front), cost one unit. The budget check
+    and within_render_window both need it, so it is kept on g.
+    """
+    cost = g.get('render_cost')
+    if cost is None:
+        cost = g.render_cost = measure_render_cost()
+    return cost
+
+def measure_render_cost():
+    data = request_body(request)
+    output_format = resolve_output_format(data)
+    if output_format is None:
+        return 1
+    
+    count = 1
+    if request.endpoint in SEQUENCE_PAGE_LIMITS:
+        data, page, error_message = sequence_request(request.endpoint)
+        if error_message or str(data.get('save_mode', 'rows')).lower() == 'range':
+            return 1
+        count = len(page)
+    
+    barcode_type = 'qrcode' if request.endpoint == 'generate_qrcode' else data.get('barcode_type', 'code128')
+    return max(1, math.ceil(count * symbologies.cost_factor(str(barcode_type).lower(), output_format)))
+
+def within_render_window(view):
+    """Refuse with 413 requests that cost more than the tier's smallest render budget window."""
+    @wraps(view)
+    def checked(*args, **kwargs):
+        cost = request_render_cost()
+        max_cost = RENDER_MAX_COSTS[request_rate_limit_tier()]
+        if cost > max_cost:
+            app.logger.warning(f"Refused render request costing {cost} units, over the limit of {max_cost}")
+            return jsonify({
+                'error': f'This request costs {cost} render units, more than the {max_cost} allowed per request. Split it into smaller requests.',
+                'status': 'error',
+                'cost': cost,
+                'max_cost': max_cost
+            }), 413
+        return view(*args, **kwargs)
+    return checked
+
+def sequence_request(endpoint):
+    """Return (data, page, error_message) for this request to a sequence endpoint.
+    
+    The render-budget cost and the view both need it, so the body is
+    parsed and the page planned once per request and kept on g.
+    """
+    parsed = g.get('sequence_request')
+    if parsed is None or parsed[0] != endpoint:
+        data = SEQUENCE_REQUESTS[endpoint].load(request)
+        _, page, error_message = requested_sequence(data, SEQUENCE_PAGE_LIMITS[endpoint])
+        parsed = g.sequence_request = (endpoint, data, page, error_message)
+    return parsed[1:]
+
+def requested_sequence(data, page_limit):
+    """Return (sequence, page, error_message) for a sequence request.
+    
+    count describes the whole sequence; offset and limit pick the members
+    this request produces, so a page deep into a long sequence costs no
+    more than the first one. Without them the page is the whole sequence.
+    """
+    sequence = SequenceSpec(data['prefix'], data['start'], data['count'], data['pad_length'],
+                            data['suffix'], data['barcode_type'])
+    offset, limit = data['offset'], data['limit']
+    if offset == 0 and limit is None:
+        if not 0 < len(sequence) <= page_limit:
+            return sequence, None, f'Count must be between 1 and {page_limit}'
+        return sequence, sequence, None
+    
+    if len(sequence) == 0:
+        return sequence, None, 'Count must be at least 1'
+    if not 0 <= offset < len(sequence):
+        return sequence, None, 'Offset must be between 0 and count - 1'
+    if limit is not None and not 0 < limit <= page_limit:
+        return sequence, None, f'Limit must be between 1 and {page_limit}'
+    page = sequence.page(offset, limit)
+    if len(page) > page_limit:
+        return sequence, None, f'Limit must be between 1 and {page_limit}'
+    return sequence, page, None
 
 def extract_request_data(request, defaults=None):
     # Extract data from request, supporting both JSON and form data
-    if defaults is None:
-        defaults = {}
-    
-    if request.is_json:
-        return {**defaults, **request.get_json()}
-    elif request.form:
-        return {**defaults, **request.form.to_dict()}
-    elif request.data:
-        try:
-            import json
-            return {**defaults, **json.loads(request.data.decode('utf-8'))}
-        except:
-            pass
-    return defaults
+    return {**(defaults or {}), **request_body(request)}
+
+# Request fields of the generate endpoints, compiled once at import
+BARCODE_REQUEST = RequestSchema(
+    data=text(''),
+    barcode_type=text('code128'),
+    is_dynamic=boolean(False),
+    redirect_url=Field(None),
+    save=boolean(False)
+)
+
+QRCODE_REQUEST = RequestSchema(
+    data=text(''),
+    is_dynamic=boolean(False),
+    redirect_url=Field(None),
+    save=boolean(False)
+)
+
+SEQUENCE_REQUEST = RequestSchema(
+    prefix=text(''),
+    suffix=text(''),
+    start=integer(1),
+    count=integer(10),
+    pad_length=integer(0),
+    barcode_type=text('code128'),
+    save_to_system=boolean(False),
+    offset=integer(0),
+    limit=integer(None)
+)
+
+BULK_SEQUENCE_REQUEST = RequestSchema(
+    prefix=text(''),
+    suffix=text(''),
+    start=integer(1),
+    count=integer(100),
+    pad_length=integer(0),
+    barcode_type=text('code128'),
+    save_to_system=boolean(False),
+    offset=integer(0),
+    limit=integer(None),
+    **{'async': boolean(False)}
+)
+
+SEQUENCE_REQUESTS = {
+    'generate_sequence': SEQUENCE_REQUEST,
+    'generate_bulk_sequence': BULK_SEQUENCE_REQUEST
+}
+
+MATERIALIZE_REQUEST = RequestSchema(
+    is_dynamic=boolean(False),
+    redirect_url=Field(None)
+)
 
 def validate_barcode_data(data, barcode_type):
-    # Very basic validation for demonstration purposes
-    if not data:
-        return False, "Barcode data is required"
+    # Length and charset, before any render work is spent on it. A single
+    # barcode's check digit has always been replaced by the computed one
+    # rather than refused, so it is not verified here.
+    with stage('validate'):
+        return validate_value(data, barcode_type, verify_check_digit=False)
+
+# Image formats every symbology can be rendered in
+IMAGE_MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def resolve_output_format(data=None):
+    """Pick the image format from an explicit 'format' parameter or the Accept header.
     
-    if barcode_type == 'ean13' and not (len(data) == 12 or len(data) == 13):
-        return False, "EAN-13 must be 12 or 13 digits"
-    elif barcode_type == 'ean8' and not (len(data) == 7 or len(data) == 8):
-        return False, "EAN-8 must be 7 or 8 digits"
-    elif barcode_type == 'upca' and not (len(data) == 11 or len(data) == 12):
-        return False, "UPC-A must be 11 or 12 digits"
+    Returns None when an unsupported format was asked for explicitly.
+    """
+    requested = (data or {}).get('format') or request.args.get('format')
+    if requested:
+        requested = str(requested).lower()
+        return requested if requested in IMAGE_MIMETYPES else None
     
-    return True, ""
+    # Only switch to SVG when the client prefers it over PNG, so <img> tags keep getting PNGs
+    accept = request.accept_mimetypes
+    if accept['image/svg+xml'] > accept['image/png']:
+        return 'svg'
+    return 'png'
 
-def generate_barcode_image(barcode_data, barcode_type, is_dynamic=False, unique_id=None, buffer=None):
+def image_data_uri(image, output_format='png'):
+    """Encode rendered image bytes as a data: URI for JSON responses."""
+    with stage('base64'):
+        img_b64 = base64.b64encode(image).decode('utf-8')
+    return f"data:{IMAGE_MIMETYPES[output_format]};base64,{img_b64}"
+
+def barcode_image_url(barcode_id, output_format='png'):
+    """Return the external URL of a saved barcode's image in the given format."""
+    if output_format == 'png':
+        return url_for('get_barcode_image', barcode_id=barcode_id, _external=True)
+    return url_for('get_barcode_image', barcode_id=barcode_id, format=output_format, _external=True)
+
+def generate_barcode_image(barcode_data, barcode_type, is_dynamic=False, unique_id=None, buffer=None, output_format='png'):
     """Generate a barcode image and save it to the provided buffer."""
-    import barcode
-    from barcode.writer import ImageWriter
-    import qrcode
-    
     if buffer is None:
         buffer = BytesIO()
     else:
@@ -134,104 +562,220 @@ def generate_barcode_image(barcode_data, barcode_type, is_dynamic=False, unique_
         buffer.seek(0)
         buffer.truncate(0)
     
+    # is_dynamic and unique_id don't change the pixels, so they stay out of the key
+    render_type = symbologies.resolve(barcode_type, output_format)
+    cache_key = make_render_key(str(barcode_data), render_type, format=output_format)
+    
+    cached = render_cache.get(cache_key) if render_cache.enabled else None
+    if cached is not None:
+        buffer.write(cached)
+        buffer.seek(0)
+        return buffer, None
+    
+    buffer, error = _render_barcode_image(barcode_data, render_type, buffer, output_format)
+    if buffer is not None and render_cache.enabled:
+        render_cache.put(cache_key, buffer.getvalue())
+    return buffer, error
+
+def _render_barcode_image(barcode_data, barcode_type, buffer, output_format='png'):
+    """Render a barcode image from scratch into buffer."""
     try:
-        if barcode_type == 'qrcode':
-            # Generate QR code image
-            img = qrcode.make(barcode_data)
-            
-            # Save directly to buffer with explicit format
-            img.save(buffer, format='PNG')
-            
-            # Ensure buffer position is at the beginning
-            buffer.seek(0)
-            
-            return buffer, None
-        else:
-            writer = ImageWriter()
-            
-            if barcode_type == 'code128':
-                bc = barcode.Code128(barcode_data, writer)
-            elif barcode_type == 'code39':
-                bc = barcode.Code39(barcode_data, writer, add_checksum=False)
-            elif barcode_type == 'ean13':
-                bc = barcode.EAN13(barcode_data, writer)
-            elif barcode_type == 'ean8':
-                bc = barcode.EAN8(barcode_data, writer)
-            elif barcode_type == 'upca':
-                bc = barcode.UPCA(barcode_data, writer)
-            else:
-                bc = barcode.Code128(barcode_data, writer)
-            
-            # Write directly to the buffer
-            bc.write(buffer)
-            buffer.seek(0)
-            return buffer, None
+        symbologies.render(barcode_data, barcode_type, buffer, output_format)
+        
+        # Ensure buffer position is at the beginning
+        buffer.seek(0)
+        return buffer, None
             
     except Exception as e:
         app.logger.error(f"Error generating barcode: {str(e)}")
         return None, str(e)
 
+def render_barcode_batch(items, barcode_type, output_format='png'):
+    """Render (index, data) pairs, yielding (index, data, image bytes, error) in order.
+    
+    Large batches go to the render farm; small ones are rendered inline so
+    they can be served from the render cache.
+    """
+    if render_farm.should_use(len(items)):
+        yield from render_farm.render(items, barcode_type, output_format)
+        return
+    
+    for index, barcode_data in items:
+        buffer, gen_error = generate_barcode_image(
+            barcode_data, barcode_type, False, None, BytesIO(), output_format
+        )
+        yield index, barcode_data, buffer.getvalue() if buffer else None, gen_error
+
+def rendered_temporary_barcodes(pending_renders, barcode_type, output_format, failed_barcodes):
+    """Render planned temporary barcodes, yielding (entry, image bytes) and recording failures."""
+    for index, barcode_data, image, gen_error in render_barcode_batch(pending_renders, barcode_type, output_format):
+        if image is None:
+            app.logger.error(f"Error generating image: {gen_error}")
+            failed_barcodes.append({
+                'index': index,
+                'data': barcode_data,
+                'error': f"Image generation failed: {gen_error or 'Failed to generate barcode image'}"
+            })
+            continue
+        
+        yield {
+            'id': f"temp_{index}",
+            'data': barcode_data,
+            'barcode_type': barcode_type
+        }, image
+
+def temporary_barcode_entries(pending_renders, barcode_type, output_format, failed_barcodes):
+    """Render planned temporary barcodes, yielding JSON entries with base64 image data."""
+    for entry, image in rendered_temporary_barcodes(pending_renders, barcode_type, output_format, failed_barcodes):
+        entry['image_data'] = image_data_uri(image, output_format)
+        yield entry
+
+# Response bodies the generate endpoints can produce
+RESPONSE_MODES = ('json', 'ndjson', 'multipart')
+
+def resolve_response_mode(data):
+    """Pick json, ndjson or multipart from 'response_format', 'stream' or the Accept header."""
+    requested = str(data.get('response_format') or '').lower()
+    if requested in RESPONSE_MODES:
+        return requested
+    
+    stream = data.get('stream', False)
+    if isinstance(stream, str):
+        stream = stream.lower() == 'true'
+    if stream:
+        return 'ndjson'
+    
+    best = request.accept_mimetypes.best
+    if best == 'application/x-ndjson':
+        return 'ndjson'
+    if best == 'multipart/mixed':
+        return 'multipart'
+    return 'json'
+
+def multipart_header_value(value):
+    """Strings as they are, anything else (flags, numbers) as JSON: true, not True."""
+    return value if isinstance(value, str) else app.json.dumps(value)
+
+def multipart_barcode_response(items, manifest, failed_barcodes, output_format):
+    """Stream images as raw multipart/mixed parts instead of base64 inside JSON.
+    
+    The first part is a JSON manifest, then one part per image whose headers
+    carry the entry fields, and a final JSON part with the failures.
+    """
+    boundary = uuid.uuid4().hex
+    delimiter = f"--{boundary}\r\n".encode('ascii')
+    mimetype = IMAGE_MIMETYPES[output_format]
+    
+    def json_part(payload):
+        return delimiter + b"Content-Type: application/json\r\n\r\n" + app.json.dumps(payload).encode('utf-8') + b"\r\n"
+    
+    def generate():
+        yield json_part({'type': 'manifest', 'format': output_format, **manifest})
+        count = 0
+        try:
+            for entry, image in items:
+                count += 1
+                headers = [
+                    f"Content-Type: {mimetype}",
+                    f"Content-Length: {len(image)}",
+                    f'Content-Disposition: attachment; filename="{entry["id"]}.{output_format}"',
+                ]
+                # Header values must stay ASCII, so entry fields are percent-encoded
+                headers.extend(f"X-Barcode-{name.replace('_', '-').title()}: {quote(multipart_header_value(value))}"
+                               for name, value in entry.items() if value is not None)
+                yield delimiter + ("\r\n".join(headers) + "\r\n\r\n").encode('ascii') + image + b"\r\n"
+        except Exception as e:
+            app.logger.error(f"Error streaming barcodes: {str(e)}")
+            yield json_part({'type': 'summary', 'status': 'error', 'error': str(e), 'count': count})
+            yield f"--{boundary}--\r\n".encode('ascii')
+            return
+        
+        failed_barcodes.sort(key=lambda failure: failure['index'])
+        yield json_part({
+            'type': 'summary',
+            'status': 'success',
+            'count': count,
+            'failed': failed_barcodes if failed_barcodes else None,
+            'saved': False
+        })
+        yield f"--{boundary}--\r\n".encode('ascii')
+    
+    return Response(stream_with_context(generate()), mimetype=f'multipart/mixed; boundary={boundary}')
+
+def ndjson_barcode_response(entries, failed_barcodes, saved):
+    """Stream one JSON line per barcode, then a summary line with the failures.
+    
+    Entries are consumed lazily, so only one image is held in memory at a time.
+    """
+    def generate():
+        count = 0
+        try:
+            for entry in entries:
+                count += 1
+                yield app.json.dumps({'type': 'barcode', **entry}) + '\n'
+        except Exception as e:
+            app.logger.error(f"Error streaming barcodes: {str(e)}")
+            yield app.json.dumps({'type': 'summary', 'status': 'error', 'error': str(e), 'count': count}) + '\n'
+            return
+        
+        failed_barcodes.sort(key=lambda failure: failure['index'])
+        message = f'Generated and saved {count} barcodes' if saved else f'Generated {count} temporary barcodes'
+        yield app.json.dumps({
+            'type': 'summary',
+            'status': 'success',
+            'message': message,
+            'count': count,
+            'failed': failed_barcodes if failed_barcodes else None,
+            'saved': saved
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # Generate Sequence of Barcodes
 @app.route('/generate_sequence', methods=['POST'])
 @limiter.limit(lambda: get_user_rate_limits('sequence_generation'))
+@limiter.shared_limit(render_budget, scope='render', cost=render_request_cost)
+@within_render_window
 def generate_sequence():
     """Generate a sequence of barcodes with incremental numbers."""
-    app.logger.info(f"Sequence Request content type: {request.content_type}")
-    app.logger.info(f"Sequence Request headers: {request.headers}")
+    if log_sampled():
+        app.logger.info(f"Sequence Request content type: {request.content_type}")
+        app.logger.info(f"Sequence Request headers: {request.headers}")
     
     try:
-        # Extract request data
-        form_defaults = {
-            'prefix': '',
-            'start': '1',
-            'count': '10',
-            'barcode_type': 'code128',
-            'suffix': '',
-            'pad_length': '0',
-            'metadata': {},
-            'save_to_system': 'false',
-        }
-        data = extract_request_data(request, form_defaults)
+        # Extract request data; offset and limit select one page of a longer sequence
+        data, page, error_message = sequence_request('generate_sequence')
         
-        # Extract and convert values
-        prefix = data.get('prefix', '')
-        suffix = data.get('suffix', '')
-        barcode_type = data.get('barcode_type', 'code128')
-        metadata = data.get('metadata', {})
+        output_format = resolve_output_format(data)
+        if output_format is None:
+            return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
         
-        # Convert numeric values
-        try:
-            start = int(data.get('start', '1'))
-        except (ValueError, TypeError):
-            start = 1
-            
-        try:
-            count = int(data.get('count', '10'))
-        except (ValueError, TypeError):
-            count = 10
-            
-        try:
-            pad_length = int(data.get('pad_length', '0'))
-        except (ValueError, TypeError):
-            pad_length = 0
+        prefix = data['prefix']
+        suffix = data['suffix']
+        barcode_type = data['barcode_type']
+        start = data['start']
+        count = data['count']
+        pad_length = data['pad_length']
             
         # Check if user is logged in
         save_to_account = current_user.is_authenticated if hasattr(current_user, 'is_authenticated') else False
         
-        # Check if save_to_system is requested and convert to boolean
-        save_to_system = data.get('save_to_system', 'false')
-        if isinstance(save_to_system, str):
-            save_to_system = save_to_system.lower() == 'true'
-        
         # Only save if user is logged in
-        save_to_system = save_to_system and save_to_account
+        save_to_system = data['save_to_system'] and save_to_account
+        
+        # save_mode 'range' stores the sequence once instead of one row per member
+        save_as_range = save_to_system and str(data.get('save_mode', 'rows')).lower() == 'range'
+        
+        # JSON by default; NDJSON or multipart/mixed stream when asked for
+        response_mode = resolve_response_mode(data)
             
-        app.logger.info(f"Processed Sequence request - prefix: {prefix}, start: {start}, count: {count}, pad: {pad_length}, type: {barcode_type}, save: {save_to_system}")
+        if log_sampled():
+            app.logger.info(f"Processed Sequence request - prefix: {prefix}, start: {start}, count: {count}, pad: {pad_length}, type: {barcode_type}, save: {save_to_system}")
         
         # Validate input
-        if count <= 0 or count > 1000:
-            app.logger.warning(f"Invalid sequence count: {count}")
-            return jsonify({'error': 'Count must be between 1 and 1000', 'status': 'error'}), 400
+        if error_message:
+            app.logger.warning(f"Invalid sequence range: {error_message}")
+            return jsonify({'error': error_message, 'status': 'error'}), 400
         
         if pad_length < 0 or pad_length > 20:
             app.logger.warning(f"Invalid padding length: {pad_length}")
@@ -240,129 +784,65 @@ def generate_sequence():
         # Generate barcodes
         barcode_ids = []
         barcode_data_list = []
-        barcode_images = []
         failed_barcodes = []
+        pending_renders = []
+        pending_rows = []
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         
         # User ID
         user_id = current_user.id if save_to_account else None
         
-        # Generate encryption key if needed and saving to account
-        encryption_key = None
-        if save_to_account and save_to_system:
-            if not current_user.encryption_key:
-                current_user.generate_encryption_key()
-                db.session.commit()
-            encryption_key = current_user.encryption_key
+        # Every member is built and validated before any render work is scheduled
+        plan = page.plan()
+        failed_barcodes.extend(plan.failures)
         
-        for i in range(count):
-            current_number = start + i
-            
-            # Apply zero-padding if needed
-            if pad_length > 0:
-                number_str = str(current_number).zfill(pad_length)
-            else:
-                number_str = str(current_number)
-            
-            # Special handling for EAN and UPC barcode types
-            if barcode_type == 'ean13' and prefix == '' and suffix == '':
-                # For standalone EAN-13, pad to 12 digits (13th is check digit)
-                if len(number_str) < 12:
-                    number_str = number_str.zfill(12)
-            elif barcode_type == 'ean8' and prefix == '' and suffix == '':
-                # For standalone EAN-8, pad to 7 digits (8th is check digit)
-                if len(number_str) < 7:
-                    number_str = number_str.zfill(7)
-            elif barcode_type == 'upca' and prefix == '' and suffix == '':
-                # For standalone UPC-A, pad to 11 digits (12th is check digit)
-                if len(number_str) < 11:
-                    number_str = number_str.zfill(11)
-                
-            barcode_data = f"{prefix}{number_str}{suffix}"
+        # Members of a range-saved sequence are derived on demand
+        for i, barcode_data in ([] if save_as_range else plan.valid):
             filename = f"{barcode_type}_{timestamp}_{i}.png"
             
-            # Validate the barcode data
-            valid, error_message = validate_barcode_data(barcode_data, barcode_type)
-            if not valid:
-                failed_barcodes.append({
-                    'index': i,
-                    'data': barcode_data,
-                    'error': error_message
-                })
-                continue
-            
             if save_to_system:
-                # Create the barcode record
-                new_barcode = Barcode(
-                    data=barcode_data,
-                    barcode_type=barcode_type,
-                    filename=filename,
-                    is_dynamic=False,
-                    user_id=user_id
-                )
-                
-                # Add metadata if provided
-                if metadata:
-                    try:
-                        if hasattr(new_barcode, 'meta_data'):
-                            new_barcode.set_metadata(metadata)
-                    except Exception as meta_error:
-                        app.logger.warning(f"Error storing metadata: {str(meta_error)}")
-                
-                # Encrypt data if user is logged in
-                if save_to_account and encryption_key:
-                    new_barcode.encrypt_data(encryption_key)
-                
-                db.session.add(new_barcode)
-                barcode_ids.append(new_barcode)
+                # Rows are inserted together once the sequence is planned
+                pending_rows.append({'data': barcode_data, 'barcode_type': barcode_type, 'filename': filename})
                 barcode_data_list.append(barcode_data)
             else:
-                # For temporary barcodes, generate images and return base64 data
-                unique_id = str(uuid.uuid4())
-                img_io = BytesIO()
-                
-                try:
-                    buffer, gen_error = generate_barcode_image(
-                        barcode_data, barcode_type, False, unique_id, img_io
-                    )
-                    
-                    if gen_error:
-                        app.logger.warning(f"Warning generating barcode: {gen_error}")
-                    
-                    if buffer:
-                        buffer.seek(0)
-                        img_b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                        
-                        barcode_images.append({
-                            'id': f"temp_{i}",
-                            'data': barcode_data,
-                            'barcode_type': barcode_type,
-                            'image_data': f"data:image/png;base64,{img_b64}"
-                        })
-                    else:
-                        raise Exception("Failed to generate barcode image")
-                except Exception as img_error:
-                    app.logger.error(f"Error generating image: {str(img_error)}")
-                    failed_barcodes.append({
-                        'index': i,
-                        'data': barcode_data,
-                        'error': f"Image generation failed: {str(img_error)}"
-                    })
+                # Temporary barcodes are rendered together once the sequence is planned
+                pending_renders.append((i, barcode_data))
+        
+        if save_as_range:
+            if failed_barcodes:
+                # Every member of a range is served later, so an invalid one can't be left out
+                failed_barcodes.sort(key=lambda failure: failure['index'])
+                return jsonify({
+                    'error': 'A range-saved sequence cannot contain invalid members; adjust the range or save it as rows',
+                    'status': 'error',
+                    'failed': failed_barcodes
+                }), 400
+            sequence = save_barcode_sequence(barcode_type, prefix, page.numbers.start, len(page), pad_length, suffix, user_id)
+            failed_barcodes.sort(key=lambda failure: failure['index'])
+            return jsonify({
+                'status': 'success',
+                'message': f'Saved sequence of {len(page)} barcodes',
+                'sequence': barcode_sequence_info(sequence, output_format),
+                'failed': failed_barcodes if failed_barcodes else None
+            })
         
         # If saving barcodes and there are barcodes to save, commit to database
-        if save_to_system and barcode_ids:
-            db.session.commit()
+        if save_to_system and pending_rows:
+            barcode_ids = insert_barcode_rows(pending_rows, user_id)
             
             # Prepare sequence info for response
             sequence_info = []
-            for i, barcode in enumerate(barcode_ids):
+            for barcode_id, barcode_data in zip(barcode_ids, barcode_data_list):
                 sequence_info.append({
-                    'id': barcode.id,
-                    'data': barcode.data,
-                    'barcode_type': barcode.barcode_type,
-                    'image_url': url_for('get_barcode_image', barcode_id=barcode.id, _external=True)
+                    'id': barcode_id,
+                    'data': barcode_data,
+                    'barcode_type': barcode_type,
+                    'image_url': barcode_image_url(barcode_id, output_format)
                 })
             
+            if response_mode == 'ndjson':
+                return ndjson_barcode_response(sequence_info, failed_barcodes, saved=True)
+            
             return jsonify({
                 'status': 'success',
                 'message': f'Generated and saved {len(barcode_ids)} barcodes',
@@ -371,7 +851,21 @@ def generate_sequence():
             })
         else:
             # For non-logged in users, return the temporary barcode images
-            app.logger.info(f"Generated {len(barcode_images)} temporary barcodes in sequence")
+            if response_mode == 'multipart':
+                return multipart_barcode_response(
+                    rendered_temporary_barcodes(pending_renders, barcode_type, output_format, failed_barcodes),
+                    {'barcode_type': barcode_type, 'requested': count},
+                    failed_barcodes, output_format
+                )
+            
+            entries = temporary_barcode_entries(pending_renders, barcode_type, output_format, failed_barcodes)
+            if response_mode == 'ndjson':
+                return ndjson_barcode_response(entries, failed_barcodes, saved=False)
+            
+            barcode_images = list(entries)
+            failed_barcodes.sort(key=lambda failure: failure['index'])
+            if log_sampled():
+                app.logger.info(f"Generated {len(barcode_images)} temporary barcodes in sequence")
             
             return jsonify({
                 'status': 'success',
@@ -421,31 +915,27 @@ def landing():
 
 @app.route('/generate_barcode', methods=['POST'])
 @limiter.limit(lambda: get_user_rate_limits('barcode_generation'))
+@limiter.shared_limit(render_budget, scope='render', cost=render_request_cost)
+@within_render_window
 def generate_barcode():
     """Generate a single barcode based on the provided data."""
-    app.logger.info(f"Barcode Request content type: {request.content_type}")
-    app.logger.info(f"Barcode Request headers: {request.headers}")
+    if log_sampled():
+        app.logger.info(f"Barcode Request content type: {request.content_type}")
+        app.logger.info(f"Barcode Request headers: {request.headers}")
     
     try:
         # Extract request data
-        form_defaults = {
-            'data': '',
-            'barcode_type': 'code128',
-            'is_dynamic': False,
-            'redirect_url': None,
-            'save': False
-        }
-        data = extract_request_data(request, form_defaults)
+        data = BARCODE_REQUEST.load(request)
         
-        barcode_data = data.get('data', '')
-        barcode_type = data.get('barcode_type', 'code128')
-        is_dynamic = data.get('is_dynamic', False)
-        redirect_url = data.get('redirect_url')
+        output_format = resolve_output_format(data)
+        if output_format is None:
+            return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
         
-        # Convert save to boolean if it's a string
-        save_to_system = data.get('save', False)
-        if isinstance(save_to_system, str):
-            save_to_system = save_to_system.lower() == 'true'
+        barcode_data = data['data']
+        barcode_type = data['barcode_type']
+        is_dynamic = data['is_dynamic']
+        redirect_url = data['redirect_url']
+        save_to_system = data['save']
         
         # Validate input
         if not barcode_data:
@@ -468,7 +958,8 @@ def generate_barcode():
         if save_to_account and save_to_system:
             user_id = current_user.id
         
-        app.logger.info(f"Processed barcode request - type: {barcode_type}, save: {save_to_system}, user_id: {user_id}")
+        if log_sampled():
+            app.logger.info(f"Processed barcode request - type: {barcode_type}, save: {save_to_system}, user_id: {user_id}")
         
         # Generate a filename
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -477,19 +968,13 @@ def generate_barcode():
         
         if save_to_system:
             # Create the barcode record in database
-            new_barcode = Barcode(
-                data=barcode_data,
-                barcode_type=barcode_type,
-                filename=filename,
-                is_dynamic=is_dynamic,
-                redirect_url=redirect_url,
-                user_id=user_id
-            )
-            
-            db.session.add(new_barcode)
-            db.session.commit()
-            
-            barcode_id = new_barcode.id
+            barcode_id = insert_barcode_rows([{
+                'data': barcode_data,
+                'barcode_type': barcode_type,
+                'filename': filename,
+                'is_dynamic': is_dynamic,
+                'redirect_url': redirect_url
+            }], user_id)[0]
             
             # Return success response with image URL
             return jsonify({
@@ -500,13 +985,14 @@ def generate_barcode():
                 'barcode_type': barcode_type,
                 'is_dynamic': is_dynamic,
                 'redirect_url': redirect_url,
-                'image_url': url_for('get_barcode_image', barcode_id=barcode_id, _external=True)
+                'format': output_format,
+                'image_url': barcode_image_url(barcode_id, output_format)
             })
         else:
             # For temporary barcodes, generate image and return base64 data
             buffer = BytesIO()
             img_buffer, gen_error = generate_barcode_image(
-                barcode_data, barcode_type, is_dynamic, str(uuid.uuid4()), buffer
+                barcode_data, barcode_type, is_dynamic, str(uuid.uuid4()), buffer, output_format
             )
             
             if gen_error:
@@ -518,20 +1004,24 @@ def generate_barcode():
                     'error': gen_error or 'Failed to generate barcode image'
                 }), 500
             
-            # Convert to base64 for including in the response
-            img_buffer.seek(0)
-            img_b64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+            if resolve_response_mode(data) == 'multipart':
+                entry = {'id': 'temp_0', 'data': barcode_data, 'barcode_type': barcode_type,
+                         'is_dynamic': is_dynamic, 'redirect_url': redirect_url}
+                return multipart_barcode_response(
+                    [(entry, img_buffer.getvalue())], {'barcode_type': barcode_type, 'requested': 1}, [], output_format
+                )
             
             # Return success response with base64 image data
             return jsonify({
                 'status': 'success',
                 'message': 'Temporary barcode generated',
-                'id': 0,  # Temporary barcode has ID 0
+                'id': 'temp_0',  # Same temp_<index> ids as temporary sequence members
                 'data': barcode_data,
                 'barcode_type': barcode_type,
                 'is_dynamic': is_dynamic,
                 'redirect_url': redirect_url,
-                'image_data': f"data:image/png;base64,{img_b64}"
+                'format': output_format,
+                'image_data': image_data_uri(img_buffer.getvalue(), output_format)
             })
     
     except Exception as e:
@@ -542,28 +1032,25 @@ csrf.exempt(generate_barcode)
 
 @app.route('/generate_qrcode', methods=['POST'])
 @limiter.limit(lambda: get_user_rate_limits('qrcode_generation'))
+@limiter.shared_limit(render_budget, scope='render', cost=render_request_cost)
+@within_render_window
 def generate_qrcode():
     """Generate a QR code based on the provided data."""
-    app.logger.info(f"QRCode Request content type: {request.content_type}")
+    if log_sampled():
+        app.logger.info(f"QRCode Request content type: {request.content_type}")
     
     try:
         # Extract request data
-        form_defaults = {
-            'data': '',
-            'is_dynamic': False,
-            'redirect_url': None,
-            'save': False
-        }
-        data = extract_request_data(request, form_defaults)
+        data = QRCODE_REQUEST.load(request)
         
-        qr_data = data.get('data', '')
-        is_dynamic = data.get('is_dynamic', False)
-        redirect_url = data.get('redirect_url')
+        output_format = resolve_output_format(data)
+        if output_format is None:
+            return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
         
-        # Convert save to boolean if it's a string
-        save_to_system = data.get('save', False)
-        if isinstance(save_to_system, str):
-            save_to_system = save_to_system.lower() == 'true'
+        qr_data = data['data']
+        is_dynamic = data['is_dynamic']
+        redirect_url = data['redirect_url']
+        save_to_system = data['save']
         
         # Validate input
         if not qr_data:
@@ -584,7 +1071,8 @@ def generate_qrcode():
         if save_to_account and save_to_system:
             user_id = current_user.id
         
-        app.logger.info(f"Processed QR code request - dynamic: {is_dynamic}, save: {save_to_system}, user_id: {user_id}")
+        if log_sampled():
+            app.logger.info(f"Processed QR code request - dynamic: {is_dynamic}, save: {save_to_system}, user_id: {user_id}")
         
         # Generate a filename
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -593,19 +1081,13 @@ def generate_qrcode():
         
         if save_to_system:
             # Create the barcode record in database (QR code is a type of barcode in our system)
-            new_barcode = Barcode(
-                data=qr_data,
-                barcode_type='qrcode',
-                filename=filename,
-                is_dynamic=is_dynamic,
-                redirect_url=redirect_url,
-                user_id=user_id
-            )
-            
-            db.session.add(new_barcode)
-            db.session.commit()
-            
-            barcode_id = new_barcode.id
+            barcode_id = insert_barcode_rows([{
+                'data': qr_data,
+                'barcode_type': 'qrcode',
+                'filename': filename,
+                'is_dynamic': is_dynamic,
+                'redirect_url': redirect_url
+            }], user_id)[0]
             
             # Return success response with image URL
             return jsonify({
@@ -616,13 +1098,14 @@ def generate_qrcode():
                 'barcode_type': 'qrcode',
                 'is_dynamic': is_dynamic,
                 'redirect_url': redirect_url,
-                'image_url': url_for('get_barcode_image', barcode_id=barcode_id, _external=True)
+                'format': output_format,
+                'image_url': barcode_image_url(barcode_id, output_format)
             })
         else:
             # For temporary QR codes, generate image and return base64 data
             buffer = BytesIO()
             img_buffer, gen_error = generate_barcode_image(
-                qr_data, 'qrcode', is_dynamic, str(uuid.uuid4()), buffer
+                qr_data, 'qrcode', is_dynamic, str(uuid.uuid4()), buffer, output_format
             )
             
             if gen_error:
@@ -634,20 +1117,24 @@ def generate_qrcode():
                     'error': gen_error or 'Failed to generate QR code image'
                 }), 500
             
-            # Convert to base64 for including in the response
-            img_buffer.seek(0)
-            img_b64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+            if resolve_response_mode(data) == 'multipart':
+                entry = {'id': 'temp_0', 'data': qr_data, 'barcode_type': 'qrcode',
+                         'is_dynamic': is_dynamic, 'redirect_url': redirect_url}
+                return multipart_barcode_response(
+                    [(entry, img_buffer.getvalue())], {'barcode_type': 'qrcode', 'requested': 1}, [], output_format
+                )
             
             # Return success response with base64 image data
             return jsonify({
                 'status': 'success',
                 'message': 'Temporary QR code generated',
-                'id': 0,  # Temporary QR code has ID 0
+                'id': 'temp_0',  # Same temp_<index> ids as temporary sequence members
                 'data': qr_data,
                 'barcode_type': 'qrcode',
                 'is_dynamic': is_dynamic,
                 'redirect_url': redirect_url,
-                'image_data': f"data:image/png;base64,{img_b64}"
+                'format': output_format,
+                'image_data': image_data_uri(img_buffer.getvalue(), output_format)
             })
     
     except Exception as e:
@@ -656,6 +1143,39 @@ def generate_qrcode():
 
 csrf.exempt(generate_qrcode)
 
+def saved_barcode_image(barcode, output_format='png'):
+    """Return (stored path, image bytes, error) for a saved barcode.
+    
+    Image bytes are only returned when the barcode had to be rendered now;
+    otherwise the path of the stored render is returned.
+    """
+    image_path = render_store.get(barcode.unique_id, format=output_format)
+    if image_path:
+        return image_path, None, None
+    
+    # First fetch: render the image and persist it for next time
+    img_buffer, gen_error = generate_barcode_image(
+        barcode.data, barcode.barcode_type, barcode.is_dynamic, barcode.unique_id, BytesIO(), output_format
+    )
+    
+    if gen_error:
+        app.logger.warning(f"Warning regenerating barcode: {gen_error}")
+    
+    if not img_buffer:
+        return None, None, gen_error or 'Failed to generate barcode image'
+    
+    image = img_buffer.getvalue()
+    try:
+        image_path = render_store.put(barcode.unique_id, image, format=output_format)
+    except (OSError, ValueError) as store_error:
+        # Read-only filesystems still get the freshly rendered image
+        app.logger.warning(f"Could not store barcode render: {str(store_error)}")
+        image_path = None
+    return image_path, image, None
+
+def saved_barcode_filename(barcode, output_format='png'):
+    return f"{os.path.splitext(barcode.filename)[0]}.{output_format}"
+
 @app.route('/get_barcode_image/<int:barcode_id>')
 def get_barcode_image(barcode_id):
     """Retrieve a barcode image by ID."""
@@ -674,37 +1194,196 @@ def get_barcode_image(barcode_id):
             app.logger.warning(f"Unauthorized access to barcode: {barcode_id}")
             return jsonify({'error': 'Unauthorized access', 'status': 'error'}), 403
         
-        # Generate the barcode image
-        buffer = BytesIO()
-        img_buffer, gen_error = generate_barcode_image(
-            barcode.data, barcode.barcode_type, barcode.is_dynamic, barcode.unique_id, buffer
-        )
-        
-        if gen_error:
-            app.logger.warning(f"Warning regenerating barcode: {gen_error}")
-        
-        if not img_buffer:
-            return jsonify({
-                'status': 'error',
-                'error': gen_error or 'Failed to generate barcode image'
-            }), 500
-        
-        # Check if this is a download request
-        is_download = request.args.get('download', 'false').lower() == 'true'
+        return barcode_image_response(barcode)
+    
+    except Exception as e:
+        app.logger.error(f"Error retrieving barcode image: {str(e)}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+def barcode_image_response(barcode):
+    """Serve the image of a saved (or virtual sequence member) barcode."""
+    output_format = resolve_output_format()
+    if output_format is None:
+        return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
+    mimetype = IMAGE_MIMETYPES[output_format]
+    
+    # Check if this is a download request
+    is_download = request.args.get('download', 'false').lower() == 'true'
+    
+    image_path, image, gen_error = saved_barcode_image(barcode, output_format)
+    if image is not None:
+        # First fetch: serve the freshly rendered image
+        response = send_file(BytesIO(image), mimetype=mimetype)
+    elif image_path:
+        # Serve the stored render if this barcode has been fetched before
+        response = send_file(image_path, mimetype=mimetype, conditional=True)
+    else:
+        return jsonify({
+            'status': 'error',
+            'error': gen_error
+        }), 500
+    
+    if is_download:
+        filename = saved_barcode_filename(barcode, output_format)
+        response.headers.set('Content-Disposition', f'attachment; filename={filename}')
+    
+    return response
+
+# Signs the id list handed from the POST to the GET of a ZIP download
+zip_download_serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='barcode-zip-download')
+
+# Download tokens stay valid for an hour
+ZIP_DOWNLOAD_TOKEN_MAX_AGE = 3600
+
+# Barcodes are loaded from the database this many at a time while streaming
+ZIP_QUERY_CHUNK_SIZE = 500
+
+@app.route('/api/user/barcodes/download-zip', methods=['GET', 'POST'])
+@app.route('/api/barcodes/download-zip', methods=['GET'])
+def download_barcodes_zip():
+    """Stream a ZIP archive of saved barcode images.
+    
+    POST {ids: [...], sequence_ids: [...]} returns a signed download token
+    (also sent as the X-Download-Token header); GET with ?token=... or
+    ?id=...&sequence_id=... streams the archive. Without either, a logged-in
+    user gets all of their barcodes and range-saved sequences.
+    """
+    is_logged_in = hasattr(current_user, 'is_authenticated') and current_user.is_authenticated
+    user_id = current_user.id if is_logged_in else None
+    
+    try:
+        if request.method == 'POST':
+            data = extract_request_data(request, {'ids': []})
+            output_format = resolve_output_format(data)
+            if output_format is None:
+                return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
+            
+            try:
+                ids = [int(barcode_id) for barcode_id in (data.get('ids') or [])]
+                sequence_ids = [int(sequence_id) for sequence_id in (data.get('sequence_ids') or [])]
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid barcode ID', 'status': 'error'}), 400
+            
+            if not ids and not is_logged_in:
+                return jsonify({'error': 'No barcodes selected', 'status': 'error'}), 400
+            
+            # Ranges keep the token short enough for a URL even for huge sequences
+            token = zip_download_serializer.dumps({
+                'ranges': compress_id_ranges(ids),
+                'sequence_ids': sequence_ids,
+                'user_id': user_id,
+                'format': output_format
+            })
+            response = jsonify({
+                'status': 'success',
+                'count': len(ids) if ids else None,
+                'download_url': url_for('download_barcodes_zip', token=token)
+            })
+            response.headers['X-Download-Token'] = token
+            return response
         
-        # Set response headers
-        img_buffer.seek(0)
-        response = send_file(img_buffer, mimetype='image/png')
+        token = request.args.get('token')
+        if token:
+            try:
+                payload = zip_download_serializer.loads(token, max_age=ZIP_DOWNLOAD_TOKEN_MAX_AGE)
+            except BadSignature:
+                return jsonify({'error': 'Invalid or expired download token', 'status': 'error'}), 400
+            
+            if payload.get('user_id') != user_id:
+                return jsonify({'error': 'Unauthorized access', 'status': 'error'}), 403
+            ranges = payload.get('ranges') or []
+            sequence_ids = payload.get('sequence_ids') or []
+            output_format = payload.get('format', 'png')
+        else:
+            output_format = resolve_output_format()
+            if output_format is None:
+                return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
+            try:
+                ranges = compress_id_ranges(int(barcode_id) for barcode_id in request.args.getlist('id'))
+                sequence_ids = [int(sequence_id) for sequence_id in request.args.getlist('sequence_id')]
+            except ValueError:
+                return jsonify({'error': 'Invalid barcode ID', 'status': 'error'}), 400
         
-        if is_download:
-            response.headers.set('Content-Disposition', f'attachment; filename={barcode.filename}')
+        if not ranges and not is_logged_in:
+            return jsonify({'error': 'No barcodes selected', 'status': 'error'}), 400
         
-        return response
+        entries = zip_entries_for_barcodes(ranges, user_id, output_format, sequence_ids)
+        filename = f"barcodes_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+        return Response(
+            stream_with_context(stream_zip(entries)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
     
     except Exception as e:
-        app.logger.error(f"Error retrieving barcode image: {str(e)}")
+        app.logger.error(f"Error creating barcode archive: {str(e)}")
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
+csrf.exempt(download_barcodes_zip)
+
+def zip_entries_for_barcodes(ranges, user_id, output_format='png', sequence_ids=None):
+    """Yield (archive name, image bytes) for the barcodes the user may access.
+    
+    Rows are fetched in chunks so memory stays flat for tens of thousands of codes.
+    With neither ranges nor sequence_ids, that is every barcode and range-saved
+    sequence of the user.
+    """
+    everything = not ranges and not sequence_ids
+    if ranges:
+        def barcode_chunks():
+            chunk = []
+            for barcode_id in expand_id_ranges(ranges):
+                chunk.append(barcode_id)
+                if len(chunk) == ZIP_QUERY_CHUNK_SIZE:
+                    yield Barcode.query.filter(Barcode.id.in_(chunk)).order_by(Barcode.id).all()
+                    chunk = []
+            if chunk:
+                yield Barcode.query.filter(Barcode.id.in_(chunk)).order_by(Barcode.id).all()
+        barcodes = (barcode for chunk in barcode_chunks() for barcode in chunk)
+    elif everything:
+        barcodes = Barcode.query.filter_by(user_id=user_id).order_by(Barcode.id).yield_per(ZIP_QUERY_CHUNK_SIZE)
+    else:
+        # Only sequences were asked for
+        barcodes = ()
+    
+    for barcode in barcodes:
+        # Same access rule as get_barcode_image
+        if barcode.user_id and barcode.user_id != user_id:
+            continue
+        
+        image_path, image, gen_error = saved_barcode_image(barcode, output_format)
+        if image is None and image_path:
+            with open(image_path, 'rb') as handle:
+                image = handle.read()
+        if image is None:
+            app.logger.warning(f"Skipping barcode {barcode.id} in archive: {gen_error}")
+            continue
+        
+        yield f"{barcode.id}_{saved_barcode_filename(barcode, output_format)}", image
+        # Rendered rows are done with; keep the session from growing with the archive
+        db.session.expunge(barcode)
+    
+    if user_id is None or not (everything or sequence_ids):
+        return
+    for sequence in user_sequences(user_id, sequence_ids=None if everything else sequence_ids):
+        yield from zip_entries_for_sequence(sequence, output_format)
+
+def zip_entries_for_sequence(sequence, output_format='png'):
+    """Yield (archive name, image bytes) for every valid member of a range-saved sequence."""
+    spec = sequence.spec()
+    for offset in range(0, len(spec), ZIP_QUERY_CHUNK_SIZE):
+        for index, _ in spec.page(offset, ZIP_QUERY_CHUNK_SIZE).plan().valid:
+            member = sequence.member(index)
+            image_path, image, gen_error = saved_barcode_image(member, output_format)
+            if image is None and image_path:
+                with open(image_path, 'rb') as handle:
+                    image = handle.read()
+            if image is None:
+                app.logger.warning(f"Skipping member {index} of sequence {sequence.id} in archive: {gen_error}")
+                continue
+            # Member filenames already name the sequence and position
+            yield saved_barcode_filename(member, output_format), image
+
 @app.route('/api/rate_limit_status')
 @limiter.limit("5 per minute")  # Much more lenient limit just for status checks
 def rate_limit_status():
@@ -721,6 +1400,40 @@ def rate_limit_status():
         "reset_at": (datetime.now() + timedelta(hours=1)).isoformat()
     })
 
+@app.route('/api/render_cache_stats')
+def render_cache_stats():
+    """Return hit/miss/eviction counters for this worker's render cache."""
+    return jsonify({
+        'status': 'success',
+        'cache': render_cache.stats(),
+        'renderer': symbologies.stats(),
+        'db_writer': db_writer.stats() if db_writer is not None else None
+    })
+
+def metrics_authorized():
+    """True for a request carrying METRICS_TOKEN as a bearer token, or from an admin."""
+    token = app.config['METRICS_TOKEN']
+    if token:
+        sent = request.headers.get('Authorization', '').encode('utf-8')
+        if hmac.compare_digest(sent, f'Bearer {token}'.encode('utf-8')):
+            return True
+    is_logged_in = hasattr(current_user, 'is_authenticated') and current_user.is_authenticated
+    return bool(is_logged_in and hasattr(current_user, 'is_admin') and current_user.is_admin)
+
+@app.route('/metrics')
+@limiter.exempt
+def metrics():
+    """Stage and request latency histograms for this worker, in the Prometheus text format."""
+    if not metrics_authorized():
+        return jsonify({'error': 'Not authorized to read metrics', 'status': 'error'}), 403
+    
+    cache = render_cache.stats()
+    body = instrumentation.metrics_text({
+        'barcode_render_cache_entries': ('Images held in the render cache.', cache['entries']),
+        'barcode_render_cache_bytes': ('Bytes held in the render cache.', cache['bytes']),
+    })
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/user/auth_status')
 def auth_status():
     """Return the authentication status of the current user."""
@@ -736,10 +1449,33 @@ def auth_status():
         'username': current_user.username if is_logged_in else None
     })
 
+# Page size limits for /api/get_barcodes
+BARCODE_PAGE_SIZE = 100
+BARCODE_PAGE_MAX = 500
+
+def encode_barcode_cursor(barcode):
+    """Encode the (created_at, id) position of the last row on a page."""
+    position = json.dumps([barcode.created_at.isoformat(), barcode.id])
+    return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_barcode_cursor(cursor):
+    """Return the (created_at, id) position from a cursor, or raise ValueError."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, barcode_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(barcode_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
 @app.route('/barcodes')
 @app.route('/api/get_barcodes')
 def get_barcodes():
-    """Return the list of barcodes for the current user."""
+    """Return one page of the current user's barcodes, newest first.
+    
+    Pages are keyset-paginated: pass the returned next_cursor as ?cursor=
+    to get the following page. ?limit= sets the page size (capped at
+    BARCODE_PAGE_MAX) and ?barcode_type= filters by symbology.
+    """
     is_logged_in = hasattr(current_user, 'is_authenticated') and current_user.is_authenticated
     
     if not is_logged_in:
@@ -749,9 +1485,32 @@ def get_barcodes():
             'barcodes': []
         })
     
+    limit = request.args.get('limit', BARCODE_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, BARCODE_PAGE_MAX))
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            position = decode_barcode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'status': 'error'}), 400
+    
     try:
-        # Get barcodes for the current user
-        barcodes = Barcode.query.filter_by(user_id=current_user.id).order_by(Barcode.created_at.desc()).all()
+        query = Barcode.query.filter_by(user_id=current_user.id)
+        
+        barcode_type = request.args.get('barcode_type')
+        if barcode_type:
+            query = query.filter_by(barcode_type=barcode_type)
+        if cursor:
+            query = query.filter(tuple_(Barcode.created_at, Barcode.id) < position)
+        
+        # Fetch one extra row to know whether another page follows
+        barcodes = query.order_by(Barcode.created_at.desc(), Barcode.id.desc()).limit(limit + 1).all()
+        has_more = len(barcodes) > limit
+        barcodes = barcodes[:limit]
+        
+        # Build the image URL once and append ids instead of calling url_for per row
+        image_url_prefix = url_for('get_barcode_image', barcode_id=0, _external=True)[:-1]
         
         # Format the barcodes for JSON response
         barcodes_list = []
@@ -763,14 +1522,22 @@ def get_barcodes():
                 'created_at': barcode.created_at.isoformat(),
                 'is_dynamic': barcode.is_dynamic,
                 'redirect_url': barcode.redirect_url,
-                'image_url': url_for('get_barcode_image', barcode_id=barcode.id, _external=True)
+                'image_url': f"{image_url_prefix}{barcode.id}"
             })
         
-        return jsonify({
+        response = {
             'status': 'success',
             'count': len(barcodes_list),
-            'barcodes': barcodes_list
-        })
+            'barcodes': barcodes_list,
+            'has_more': has_more,
+            'next_cursor': encode_barcode_cursor(barcodes[-1]) if has_more else None
+        }
+        # Range-saved sequences have no barcode rows; they come with the first page
+        if not cursor:
+            response['sequences'] = [
+                barcode_sequence_info(sequence) for sequence in user_sequences(current_user.id, barcode_type)
+            ]
+        return jsonify(response)
     except Exception as e:
         app.logger.error(f"Error getting barcodes: {str(e)}")
         return jsonify({
@@ -790,9 +1557,12 @@ def barcode_image(barcode_id):
             buffer = BytesIO()
             barcode_data = request.args.get('data', 'TEMP')
             barcode_type = request.args.get('type', 'code128')
+            output_format = resolve_output_format()
+            if output_format is None:
+                return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
             
             img_buffer, gen_error = generate_barcode_image(
-                barcode_data, barcode_type, False, str(uuid.uuid4()), buffer
+                barcode_data, barcode_type, False, str(uuid.uuid4()), buffer, output_format
             )
             
             if gen_error:
@@ -806,7 +1576,7 @@ def barcode_image(barcode_id):
             
             # Set response headers
             img_buffer.seek(0)
-            return send_file(img_buffer, mimetype='image/png')
+            return send_file(img_buffer, mimetype=IMAGE_MIMETYPES[output_format])
         
         # For non-temporary barcodes, try to convert to int and use the get_barcode_image route
         try:
@@ -831,221 +1601,145 @@ def bulk_sequence_generator():
 # Add this route before the final run statement
 @app.route('/api/generate_bulk_sequence', methods=['POST'])
 @limiter.limit(lambda: get_user_rate_limits('sequence_generation'))
+@limiter.shared_limit(render_budget, scope='render', cost=render_request_cost)
+@within_render_window
 def generate_bulk_sequence():
     """API endpoint for generating bulk sequences of barcodes."""
-    app.logger.info(f"Bulk Sequence Request content type: {request.content_type}")
+    if log_sampled():
+        app.logger.info(f"Bulk Sequence Request content type: {request.content_type}")
     
     try:
-        # Extract request data
-        form_defaults = {
-            'prefix': '',
-            'start': '1',
-            'count': '100',
-            'barcode_type': 'code128',
-            'suffix': '',
-            'pad_length': '0',
-            'batch_size': '10',
-            'metadata': {},
-            'save_to_system': 'false',
-        }
-        data = extract_request_data(request, form_defaults)
+        # Extract request data; offset and limit select one page of a longer sequence
+        data, page, error_message = sequence_request('generate_bulk_sequence')
         
-        # Extract and convert values
-        prefix = data.get('prefix', '')
-        suffix = data.get('suffix', '')
-        barcode_type = data.get('barcode_type', 'code128')
-        metadata = data.get('metadata', {})
+        output_format = resolve_output_format(data)
+        if output_format is None:
+            return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
         
-        # Convert numeric values
-        try:
-            start = int(data.get('start', '1'))
-        except (ValueError, TypeError):
-            start = 1
-            
-        try:
-            count = int(data.get('count', '100'))
-        except (ValueError, TypeError):
-            count = 100
-            
-        try:
-            pad_length = int(data.get('pad_length', '0'))
-        except (ValueError, TypeError):
-            pad_length = 0
-            
-        try:
-            batch_size = int(data.get('batch_size', '10'))
-            batch_size = min(batch_size, 50)  # Limit batch size to 50 for performance
-        except (ValueError, TypeError):
-            batch_size = 10
+        prefix = data['prefix']
+        suffix = data['suffix']
+        barcode_type = data['barcode_type']
+        start = data['start']
+        count = data['count']
+        pad_length = data['pad_length']
         
         # Check if user is logged in
         save_to_account = current_user.is_authenticated if hasattr(current_user, 'is_authenticated') else False
         
-        # Check if save_to_system is requested and convert to boolean
-        save_to_system = data.get('save_to_system', 'false')
-        if isinstance(save_to_system, str):
-            save_to_system = save_to_system.lower() == 'true'
-        
         # Only save if user is logged in
-        save_to_system = save_to_system and save_to_account
+        save_to_system = data['save_to_system'] and save_to_account
+        
+        # save_mode 'range' stores the sequence once instead of one row per member
+        save_as_range = save_to_system and str(data.get('save_mode', 'rows')).lower() == 'range'
+        
+        # JSON by default; NDJSON or multipart/mixed stream when asked for
+        response_mode = resolve_response_mode(data)
             
-        app.logger.info(f"Processed Bulk Sequence request - prefix: {prefix}, start: {start}, count: {count}, pad: {pad_length}, type: {barcode_type}, save: {save_to_system}, batch: {batch_size}")
+        if log_sampled():
+            app.logger.info(f"Processed Bulk Sequence request - prefix: {prefix}, start: {start}, count: {count}, pad: {pad_length}, type: {barcode_type}, save: {save_to_system}")
         
         # Validate input
-        if count <= 0 or count > 5000:
-            app.logger.warning(f"Invalid sequence count: {count}")
-            return jsonify({'error': 'Count must be between 1 and 5000', 'status': 'error'}), 400
+        if error_message:
+            app.logger.warning(f"Invalid sequence range: {error_message}")
+            return jsonify({'error': error_message, 'status': 'error'}), 400
         
         if pad_length < 0 or pad_length > 20:
             app.logger.warning(f"Invalid padding length: {pad_length}")
             return jsonify({'error': 'Padding length must be between 0 and 20', 'status': 'error'}), 400
+        
+        # Hand large runs to the background workers and return immediately
+        if data['async'] and not save_as_range:
+            job = submit_bulk_job({
+                'prefix': prefix,
+                'start': page.numbers.start,
+                'count': len(page),
+                'pad_length': pad_length,
+                'suffix': suffix,
+                'barcode_type': barcode_type,
+                'format': output_format,
+                'save_to_system': save_to_system
+            }, user_id=current_user.id if save_to_account else None)
+            
+            return jsonify({
+                'status': 'accepted',
+                'message': f'Queued generation of {len(page)} barcodes',
+                'job_id': job.id,
+                'status_url': url_for('get_job', job_id=job.id, _external=True)
+            }), 202
 
         # Generate barcodes
         barcode_ids = []
         barcode_data_list = []
-        barcode_images = []
         failed_barcodes = []
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         
         # User ID
         user_id = current_user.id if save_to_account else None
         
-        # Generate encryption key if needed and saving to account
-        encryption_key = None
-        if save_to_account and save_to_system:
-            if not current_user.encryption_key:
-                current_user.generate_encryption_key()
-                db.session.commit()
-            encryption_key = current_user.encryption_key
+        pending_renders = []
+        pending_rows = []
         
-        # For bulk generation, we process in batches for better performance
-        total_generated = 0
+        # Every member is built and validated before any render work is scheduled
+        plan = page.plan()
+        failed_barcodes.extend(plan.failures)
         
-        for batch_start in range(0, count, batch_size):
-            batch_end = min(batch_start + batch_size, count)
-            batch_count = batch_end - batch_start
-            
-            for i in range(batch_count):
-                current_number = start + batch_start + i
-                
-                # Apply zero-padding if needed
-                if pad_length > 0:
-                    number_str = str(current_number).zfill(pad_length)
-                else:
-                    number_str = str(current_number)
-                
-                # Special handling for EAN and UPC barcode types
-                if barcode_type == 'ean13' and prefix == '' and suffix == '':
-                    # For standalone EAN-13, pad to 12 digits (13th is check digit)
-                    if len(number_str) < 12:
-                        number_str = number_str.zfill(12)
-                elif barcode_type == 'ean8' and prefix == '' and suffix == '':
-                    # For standalone EAN-8, pad to 7 digits (8th is check digit)
-                    if len(number_str) < 7:
-                        number_str = number_str.zfill(7)
-                elif barcode_type == 'upca' and prefix == '' and suffix == '':
-                    # For standalone UPC-A, pad to 11 digits (12th is check digit)
-                    if len(number_str) < 11:
-                        number_str = number_str.zfill(11)
-                    
-                barcode_data = f"{prefix}{number_str}{suffix}"
-                filename = f"{barcode_type}_{timestamp}_{batch_start + i}.png"
-                
-                # Validate the barcode data
-                valid, error_message = validate_barcode_data(barcode_data, barcode_type)
-                if not valid:
-                    failed_barcodes.append({
-                        'index': batch_start + i,
-                        'data': barcode_data,
-                        'error': error_message
-                    })
-                    continue
-                
-                if save_to_system:
-                    # Create the barcode record
-                    new_barcode = Barcode(
-                        data=barcode_data,
-                        barcode_type=barcode_type,
-                        filename=filename,
-                        is_dynamic=False,
-                        user_id=user_id
-                    )
-                    
-                    # Add metadata if provided
-                    if metadata:
-                        try:
-                            if hasattr(new_barcode, 'set_metadata'):
-                                new_barcode.set_metadata(metadata)
-                        except Exception as meta_error:
-                            app.logger.warning(f"Error storing metadata: {str(meta_error)}")
-                    
-                    # Encrypt data if user is logged in
-                    if save_to_account and encryption_key:
-                        if hasattr(new_barcode, 'encrypt_data'):
-                            new_barcode.encrypt_data(encryption_key)
-                    
-                    db.session.add(new_barcode)
-                    barcode_ids.append(new_barcode)
-                    barcode_data_list.append(barcode_data)
-                else:
-                    # For temporary barcodes, generate images and return base64 data
-                    unique_id = str(uuid.uuid4())
-                    img_io = BytesIO()
-                    
-                    try:
-                        buffer, gen_error = generate_barcode_image(
-                            barcode_data, barcode_type, False, unique_id, img_io
-                        )
-                        
-                        if gen_error:
-                            app.logger.warning(f"Warning generating barcode: {gen_error}")
-                        
-                        if buffer:
-                            buffer.seek(0)
-                            img_b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                            
-                            barcode_images.append({
-                                'id': f"temp_{batch_start + i}",
-                                'data': barcode_data,
-                                'barcode_type': barcode_type,
-                                'image_data': f"data:image/png;base64,{img_b64}"
-                            })
-                        else:
-                            raise Exception("Failed to generate barcode image")
-                    except Exception as img_error:
-                        app.logger.error(f"Error generating image: {str(img_error)}")
-                        failed_barcodes.append({
-                            'index': batch_start + i,
-                            'data': barcode_data,
-                            'error': f"Image generation failed: {str(img_error)}"
-                        })
-            
-            # If saving barcodes, commit after each batch to avoid long transactions
-            if save_to_system and barcode_ids:
-                try:
-                    db.session.commit()
-                    app.logger.info(f"Committed batch of {len(barcode_ids)} barcodes")
-                except Exception as db_error:
-                    app.logger.error(f"Error committing batch: {str(db_error)}")
-                    db.session.rollback()
-                    return jsonify({
-                        'error': f"Database error: {str(db_error)}",
-                        'status': 'error'
-                    }), 500
-            
-            total_generated += len(barcode_images) if not save_to_system else len(barcode_ids)
+        # Members of a range-saved sequence are derived on demand
+        for i, barcode_data in ([] if save_as_range else plan.valid):
+            if save_to_system:
+                filename = f"{barcode_type}_{timestamp}_{i}.png"
+                pending_rows.append({'data': barcode_data, 'barcode_type': barcode_type, 'filename': filename})
+                barcode_data_list.append(barcode_data)
+            else:
+                # Temporary barcodes are rendered together once the sequence is planned
+                pending_renders.append((i, barcode_data))
+        
+        if save_as_range:
+            if failed_barcodes:
+                # Every member of a range is served later, so an invalid one can't be left out
+                failed_barcodes.sort(key=lambda failure: failure['index'])
+                return jsonify({
+                    'error': 'A range-saved sequence cannot contain invalid members; adjust the range or save it as rows',
+                    'status': 'error',
+                    'failed': failed_barcodes
+                }), 400
+            sequence = save_barcode_sequence(barcode_type, prefix, page.numbers.start, len(page), pad_length, suffix, user_id)
+            failed_barcodes.sort(key=lambda failure: failure['index'])
+            return jsonify({
+                'status': 'success',
+                'message': f'Saved sequence of {len(page)} barcodes',
+                'sequence': barcode_sequence_info(sequence, output_format),
+                'failed': failed_barcodes if failed_barcodes else None
+            })
+        
+        # If saving barcodes, insert and commit in large chunks to avoid long transactions
+        for chunk_start in range(0, len(pending_rows), BARCODE_INSERT_CHUNK_SIZE):
+            chunk = pending_rows[chunk_start:chunk_start + BARCODE_INSERT_CHUNK_SIZE]
+            try:
+                barcode_ids.extend(insert_barcode_rows(chunk, user_id))
+                if log_sampled():
+                    app.logger.info(f"Committed batch of {len(chunk)} barcodes")
+            except Exception as db_error:
+                app.logger.error(f"Error committing batch: {str(db_error)}")
+                db.session.rollback()
+                return jsonify({
+                    'error': f"Database error: {str(db_error)}",
+                    'status': 'error'
+                }), 500
         
         if save_to_system:
             # Prepare sequence info for response
             sequence_info = []
-            for i, barcode in enumerate(barcode_ids):
+            for barcode_id, barcode_data in zip(barcode_ids, barcode_data_list):
                 sequence_info.append({
-                    'id': barcode.id,
-                    'data': barcode.data,
-                    'barcode_type': barcode.barcode_type,
-                    'image_url': url_for('get_barcode_image', barcode_id=barcode.id, _external=True)
+                    'id': barcode_id,
+                    'data': barcode_data,
+                    'barcode_type': barcode_type,
+                    'image_url': barcode_image_url(barcode_id, output_format)
                 })
             
+            if response_mode == 'ndjson':
+                return ndjson_barcode_response(sequence_info, failed_barcodes, saved=True)
+            
             return jsonify({
                 'status': 'success',
                 'message': f'Generated and saved {len(barcode_ids)} barcodes',
@@ -1053,8 +1747,22 @@ def generate_bulk_sequence():
                 'failed': failed_barcodes if failed_barcodes else None
             })
         else:
-            # For non-logged in users, return the temporary barcode images
-            app.logger.info(f"Generated {len(barcode_images)} temporary barcodes in bulk sequence")
+            # For non-logged in users, return the temporary barcode images rendered across all cores
+            if response_mode == 'multipart':
+                return multipart_barcode_response(
+                    rendered_temporary_barcodes(pending_renders, barcode_type, output_format, failed_barcodes),
+                    {'barcode_type': barcode_type, 'requested': count},
+                    failed_barcodes, output_format
+                )
+            
+            entries = temporary_barcode_entries(pending_renders, barcode_type, output_format, failed_barcodes)
+            if response_mode == 'ndjson':
+                return ndjson_barcode_response(entries, failed_barcodes, saved=False)
+            
+            barcode_images = list(entries)
+            failed_barcodes.sort(key=lambda failure: failure['index'])
+            if log_sampled():
+                app.logger.info(f"Generated {len(barcode_images)} temporary barcodes in bulk sequence")
             
             return jsonify({
                 'status': 'success',
@@ -1070,6 +1778,615 @@ def generate_bulk_sequence():
 
 csrf.exempt(generate_bulk_sequence)
 
+# Progress is committed to the job row after this many items
+JOB_PROGRESS_INTERVAL = 50
+
+# Results returned per page by /api/jobs/<id>
+JOB_RESULTS_PAGE_SIZE = 100
+
+_job_table_ready = False
+
+def ensure_job_table():
+    """Create the bulk_job table on first use so existing databases pick it up."""
+    global _job_table_ready
+    if not _job_table_ready:
+        BulkJob.__table__.create(db.engine, checkfirst=True)
+        columns = {column['name'] for column in inspect_schema(db.engine).get_columns('bulk_job')}
+        if 'claimed_at' not in columns:
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql('ALTER TABLE bulk_job ADD COLUMN claimed_at DATETIME')
+        _job_table_ready = True
+
+class JobLeaseLost(Exception):
+    """Another worker reclaimed a job this worker was still running."""
+
+def job_directory(job_id):
+    return os.path.join(app.config['JOBS_DIR'], job_id)
+
+def submit_bulk_job(params, user_id=None):
+    """Queue a bulk sequence job and return its row."""
+    ensure_job_table()
+    job = BulkJob(params=json.dumps(params), user_id=user_id, total=params['count'])
+    db.session.add(job)
+    db.session.commit()
+    app.logger.info(f"Queued bulk job {job.id} for {params['count']} barcodes")
+    return job
+
+def claim_next_job(worker_name):
+    """Atomically take the oldest queued (or abandoned running) job and return it, or None.
+    
+    A running job whose lease hasn't been renewed for JOB_LEASE_SECONDS
+    belongs to a worker that died, and is run again. Jobs that save
+    resume after their last committed batch; the others start over.
+    """
+    for _ in range(5):
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=app.config['JOB_LEASE_SECONDS'])
+        claimable = or_(
+            BulkJob.status == 'queued',
+            and_(BulkJob.status == 'running', func.coalesce(BulkJob.claimed_at, BulkJob.started_at) < lease_expired)
+        )
+        candidate = db.session.query(BulkJob.id).filter(claimable).order_by(BulkJob.created_at).first()
+        if candidate is None:
+            return None
+        
+        # Only one worker's UPDATE can still see the job as claimable
+        claimed = BulkJob.query.filter(BulkJob.id == candidate.id, claimable).update(
+            {'status': 'running', 'worker': worker_name, 'started_at': now, 'claimed_at': now},
+            synchronize_session=False
+        )
+        db.session.commit()
+        if claimed == 1:
+            return db.session.get(BulkJob, candidate.id)
+    return None
+
+def update_claimed_job(job, worker_name, **values):
+    """Write values to job and renew its lease, unless another worker has reclaimed it."""
+    values['claimed_at'] = datetime.utcnow()
+    updated = BulkJob.query.filter_by(id=job.id, worker=worker_name).update(values, synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        raise JobLeaseLost(job.id)
+
+def insert_job_batch(job, worker_name, rows, manifest, batch, **values):
+    """Insert one batch of a saving job and record its progress in the same transaction.
+    
+    The batch's manifest lines are written before the commit, so after a
+    crash the manifest may run ahead of the job's progress but never
+    behind it. Raises JobLeaseLost, inserting nothing, if another worker
+    has reclaimed the job.
+    """
+    with stage('db_write'):
+        barcode_ids = db.session.execute(barcode_insert_statement(), prepare_barcode_rows(rows, job.user_id)).scalars().all()
+        for (index, barcode_data), barcode_id in zip(batch, barcode_ids):
+            manifest.write(json.dumps({'index': index, 'data': barcode_data, 'id': barcode_id}) + '\n')
+        manifest.flush()
+        values['claimed_at'] = datetime.utcnow()
+        updated = BulkJob.query.filter_by(id=job.id, worker=worker_name).update(values, synchronize_session=False)
+        if not updated:
+            db.session.rollback()
+            raise JobLeaseLost(job.id)
+        db.session.commit()
+
+def truncate_manifest(path, lines):
+    """Cut a job manifest down to its first lines complete lines."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as manifest:
+        kept = size = 0
+        for line in manifest:
+            if kept == lines or not line.endswith(b'\n'):
+                break
+            kept += 1
+            size += len(line)
+        manifest.truncate(size)
+
+def run_bulk_job(job, worker_name=None):
+    """Render (or save) every member of a job, recording progress as it goes."""
+    worker_name = worker_name or job.worker
+    params = json.loads(job.params)
+    barcode_type = params['barcode_type']
+    output_format = params.get('format', 'png')
+    directory = job_directory(job.id)
+    os.makedirs(directory, exist_ok=True)
+    
+    plan = SequenceSpec(
+        params['prefix'], params['start'], params['count'], params['pad_length'], params['suffix'], barcode_type
+    ).plan()
+    failed_barcodes = plan.failures
+    planned = plan.valid
+    
+    processed = len(failed_barcodes)
+    
+    def record_progress(**values):
+        update_claimed_job(
+            job, worker_name, completed=processed,
+            failed=json.dumps(sorted(failed_barcodes, key=lambda failure: failure['index'])), **values
+        )
+    
+    manifest_path = os.path.join(directory, 'results.ndjson')
+    if params.get('save_to_system') and job.user_id:
+        # The plan is deterministic, so completed minus the planned failures
+        # is how many members earlier attempts of this job committed
+        saved = min(max(0, job.completed - len(failed_barcodes)), len(planned))
+        truncate_manifest(manifest_path, saved)
+        processed += saved
+        
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            for batch_start in range(saved, len(planned), ZIP_QUERY_CHUNK_SIZE):
+                batch = planned[batch_start:batch_start + ZIP_QUERY_CHUNK_SIZE]
+                rows = [
+                    {'data': barcode_data, 'barcode_type': barcode_type, 'filename': f"{barcode_type}_{timestamp}_{index}.png"}
+                    for index, barcode_data in batch
+                ]
+                processed += len(batch)
+                insert_job_batch(job, worker_name, rows, manifest, batch, completed=processed)
+        
+        record_progress(status='completed', finished_at=datetime.utcnow())
+        app.logger.info(f"Finished bulk job {job.id}: {processed} items, {len(failed_barcodes)} failed")
+        return
+    
+    # Rendering writes no rows, so a reclaimed job starts over, and so does its manifest
+    with open(manifest_path, 'w', encoding='utf-8') as manifest:
+        for index, barcode_data, image, gen_error in render_barcode_batch(planned, barcode_type, output_format):
+            if image is None:
+                failed_barcodes.append({
+                    'index': index,
+                    'data': barcode_data,
+                    'error': f"Image generation failed: {gen_error or 'Failed to generate barcode image'}"
+                })
+            else:
+                filename = f"{index}.{output_format}"
+                with open(os.path.join(directory, filename), 'wb') as handle:
+                    handle.write(image)
+                manifest.write(json.dumps({'index': index, 'data': barcode_data, 'file': filename}) + '\n')
+            
+            processed += 1
+            if processed % JOB_PROGRESS_INTERVAL == 0:
+                manifest.flush()
+                record_progress()
+    
+    record_progress(status='completed', finished_at=datetime.utcnow())
+    app.logger.info(f"Finished bulk job {job.id}: {processed} items, {len(failed_barcodes)} failed")
+
+def read_job_results(job, offset=0, limit=JOB_RESULTS_PAGE_SIZE):
+    """Return finished items of a job from its manifest, without loading the whole file."""
+    manifest_path = os.path.join(job_directory(job.id), 'results.ndjson')
+    if not os.path.exists(manifest_path):
+        return []
+    
+    results = []
+    with open(manifest_path, encoding='utf-8') as manifest:
+        for line_number, line in enumerate(manifest):
+            if line_number < offset:
+                continue
+            if len(results) >= limit or not line.endswith('\n'):
+                break
+            results.append(json.loads(line))
+    return results
+
+def run_job_worker(poll_interval=1.0, once=False):
+    """Pull jobs off the queue until interrupted (or until it is empty, with once)."""
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    ensure_job_table()
+    app.logger.info(f"Job worker {worker_name} started")
+    
+    while True:
+        job = claim_next_job(worker_name)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        
+        try:
+            run_bulk_job(job, worker_name)
+        except JobLeaseLost:
+            db.session.rollback()
+            app.logger.warning(f"Bulk job {job.id} was reclaimed by another worker; abandoning it")
+        except Exception as e:
+            app.logger.error(f"Bulk job {job.id} failed: {str(e)}")
+            db.session.rollback()
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+def _job_worker_process(poll_interval, once):
+    with app.app_context():
+        # Connections inherited from the parent must not be shared
+        db.engine.dispose(close=False)
+        # Job workers already run one per core; don't fan out again inside each
+        render_farm.workers = 1
+        run_job_worker(poll_interval, once)
+
+@app.cli.command('jobs-worker')
+@click.option('--processes', default=1, show_default=True, help='Number of worker processes.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+def jobs_worker(processes, poll_interval, once):
+    """Run background workers for queued bulk sequence jobs."""
+    if processes <= 1:
+        run_job_worker(poll_interval, once)
+        return
+    
+    workers = [
+        multiprocessing.Process(target=_job_worker_process, args=(poll_interval, once))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+def job_for_request(job_id):
+    """Load a job the current user may see, or return an error response."""
+    ensure_job_table()
+    job = db.session.get(BulkJob, job_id)
+    if not job:
+        return None, (jsonify({'error': 'Job not found', 'status': 'error'}), 404)
+    
+    is_logged_in = hasattr(current_user, 'is_authenticated') and current_user.is_authenticated
+    if job.user_id and (not is_logged_in or current_user.id != job.user_id):
+        return None, (jsonify({'error': 'Unauthorized access', 'status': 'error'}), 403)
+    return job, None
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Report progress and a page of finished results for a bulk job."""
+    job, error_response = job_for_request(job_id)
+    if error_response:
+        return error_response
+    
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        offset = 0
+    try:
+        limit = min(max(1, int(request.args.get('limit', JOB_RESULTS_PAGE_SIZE))), 1000)
+    except ValueError:
+        limit = JOB_RESULTS_PAGE_SIZE
+    
+    params = json.loads(job.params)
+    output_format = params.get('format', 'png')
+    results = []
+    for item in read_job_results(job, offset, limit):
+        entry = {'index': item['index'], 'data': item['data'], 'barcode_type': params['barcode_type']}
+        if 'id' in item:
+            entry['id'] = item['id']
+            entry['image_url'] = barcode_image_url(item['id'], output_format)
+        else:
+            entry['image_url'] = url_for('get_job_item', job_id=job.id, index=item['index'], _external=True)
+        results.append(entry)
+    
+    return jsonify({
+        'status': 'success',
+        'job': {
+            'id': job.id,
+            'status': job.status,
+            'total': job.total,
+            'completed': job.completed,
+            'progress': round(job.completed / job.total, 4) if job.total else 0.0,
+            'failed': json.loads(job.failed) if job.failed else None,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'artifact_url': url_for('get_job_artifact', job_id=job.id, _external=True) if job.status == 'completed' else None
+        },
+        'offset': offset,
+        'results': results
+    })
+
+@app.route('/api/jobs/<job_id>/items/<int:index>')
+def get_job_item(job_id, index):
+    """Serve one rendered image of a bulk job."""
+    job, error_response = job_for_request(job_id)
+    if error_response:
+        return error_response
+    
+    output_format = json.loads(job.params).get('format', 'png')
+    image_path = os.path.join(job_directory(job.id), f"{index}.{output_format}")
+    if not os.path.exists(image_path):
+        return jsonify({'error': 'Item not ready', 'status': 'error'}), 404
+    return send_file(image_path, mimetype=IMAGE_MIMETYPES[output_format], conditional=True)
+
+@app.route('/api/jobs/<job_id>/artifact')
+def get_job_artifact(job_id):
+    """Stream a finished job's images as a ZIP archive."""
+    job, error_response = job_for_request(job_id)
+    if error_response:
+        return error_response
+    
+    if job.status != 'completed':
+        return jsonify({'error': f'Job is {job.status}', 'status': 'error'}), 409
+    
+    params = json.loads(job.params)
+    output_format = params.get('format', 'png')
+    directory = job_directory(job.id)
+    manifest_path = os.path.join(directory, 'results.ndjson')
+    
+    def manifest_items():
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as manifest:
+                for line in manifest:
+                    yield json.loads(line)
+    
+    if params.get('save_to_system') and job.user_id:
+        ranges = compress_id_ranges(item['id'] for item in manifest_items())
+        # Empty ranges would mean "every barcode of the user", not "none"
+        entries = zip_entries_for_barcodes(ranges, job.user_id, output_format) if ranges else iter(())
+    else:
+        def read_entries():
+            for item in manifest_items():
+                with open(os.path.join(directory, item['file']), 'rb') as handle:
+                    yield f"{params['barcode_type']}_{item['index']}.{output_format}", handle.read()
+        entries = read_entries()
+    
+    return Response(
+        stream_with_context(stream_zip(entries)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=bulk_job_{job.id}.zip'}
+    )
+
+_sequence_tables_ready = False
+
+def ensure_sequence_tables():
+    """Create the sequence tables on first use so existing databases pick them up."""
+    global _sequence_tables_ready
+    if not _sequence_tables_ready:
+        BarcodeSequence.__table__.create(db.engine, checkfirst=True)
+        BarcodeSequenceMember.__table__.create(db.engine, checkfirst=True)
+        _sequence_tables_ready = True
+
+def save_barcode_sequence(barcode_type, prefix, start, count, pad_length, suffix, user_id):
+    """Store a sequence as a single row, whatever its length."""
+    ensure_sequence_tables()
+    sequence = BarcodeSequence(
+        barcode_type=barcode_type,
+        prefix=prefix,
+        start=start,
+        count=count,
+        pad_length=pad_length,
+        suffix=suffix,
+        user_id=user_id
+    )
+    with stage('db_write'):
+        db.session.add(sequence)
+        db.session.commit()
+    app.logger.info(f"Saved sequence {sequence.id} of {count} barcodes")
+    return sequence
+
+def sequence_member_image_url(sequence_id, index, output_format='png'):
+    if output_format == 'png':
+        return url_for('get_sequence_member_image', sequence_id=sequence_id, index=index, _external=True)
+    return url_for('get_sequence_member_image', sequence_id=sequence_id, index=index, format=output_format, _external=True)
+
+def barcode_sequence_info(sequence, output_format='png'):
+    return {
+        'id': sequence.id,
+        'barcode_type': sequence.barcode_type,
+        'prefix': sequence.prefix,
+        'start': sequence.start,
+        'count': sequence.count,
+        'pad_length': sequence.pad_length,
+        'suffix': sequence.suffix,
+        'created_at': sequence.created_at.isoformat() if sequence.created_at else None,
+        'first_data': sequence.member_data(0) if sequence.count else None,
+        'last_data': sequence.member_data(sequence.count - 1) if sequence.count else None,
+        'first_image_url': sequence_member_image_url(sequence.id, 0, output_format),
+        'members_url': url_for('get_sequence', sequence_id=sequence.id, _external=True)
+    }
+
+def user_sequences(user_id, barcode_type=None, sequence_ids=None):
+    """The user's range-saved sequences, newest first."""
+    ensure_sequence_tables()
+    query = BarcodeSequence.query.filter_by(user_id=user_id)
+    if barcode_type:
+        query = query.filter_by(barcode_type=barcode_type)
+    if sequence_ids is not None:
+        query = query.filter(BarcodeSequence.id.in_(sequence_ids))
+    return query.order_by(BarcodeSequence.created_at.desc(), BarcodeSequence.id.desc()).all()
+
+def sequence_for_request(sequence_id):
+    """Load a sequence the current user may see, or return an error response."""
+    ensure_sequence_tables()
+    sequence = db.session.get(BarcodeSequence, sequence_id)
+    if not sequence:
+        return None, (jsonify({'error': 'Sequence not found', 'status': 'error'}), 404)
+    
+    is_logged_in = hasattr(current_user, 'is_authenticated') and current_user.is_authenticated
+    if sequence.user_id and (not is_logged_in or current_user.id != sequence.user_id):
+        return None, (jsonify({'error': 'Unauthorized access', 'status': 'error'}), 403)
+    return sequence, None
+
+def sequence_member_error(sequence, index):
+    """Return an error response if index isn't a valid member of sequence, else None.
+    
+    Ranges saved before invalid members were refused may still contain
+    some; python-barcode would quietly render those as a different number.
+    """
+    if index >= sequence.count:
+        return jsonify({'error': 'Sequence member not found', 'status': 'error'}), 404
+    valid, error_message = validate_value(sequence.member_data(index), sequence.barcode_type)
+    if not valid:
+        return jsonify({'error': error_message, 'status': 'error'}), 400
+    return None
+
+def materialized_members(sequence, positions):
+    """Map sequence positions to the Barcode ids they were materialized into."""
+    rows = BarcodeSequenceMember.query.filter(
+        BarcodeSequenceMember.sequence_id == sequence.id,
+        BarcodeSequenceMember.position.in_(list(positions))
+    )
+    return {row.position: row.barcode_id for row in rows}
+
+@app.route('/api/sequences/<int:sequence_id>')
+def get_sequence(sequence_id):
+    """Describe a saved sequence and list a page of its members."""
+    sequence, error_response = sequence_for_request(sequence_id)
+    if error_response:
+        return error_response
+    
+    output_format = resolve_output_format()
+    if output_format is None:
+        return jsonify({'error': 'Unsupported image format', 'status': 'error'}), 400
+    
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        offset = 0
+    try:
+        limit = min(max(1, int(request.args.get('limit', JOB_RESULTS_PAGE_SIZE))), 1000)
+    except ValueError:
+        limit = JOB_RESULTS_PAGE_SIZE
+    
+    page = sequence.spec().page(offset, limit)
+    materialized = materialized_members(sequence, page.positions)
+    invalid = {failure['index']: failure['error'] for failure in page.plan().failures}
+    members = []
+    for index, member_data in page.items():
+        entry = {'index': index, 'data': member_data, 'barcode_type': sequence.barcode_type}
+        if index in invalid:
+            entry['error'] = invalid[index]
+        elif index in materialized:
+            entry['id'] = materialized[index]
+            entry['image_url'] = barcode_image_url(materialized[index], output_format)
+        else:
+            entry['image_url'] = sequence_member_image_url(sequence.id, index, output_format)
+        members.append(entry)
+    
+    return jsonify({
+        'status': 'success',
+        'sequence': barcode_sequence_info(sequence, output_format),
+        'offset': offset,
+        'members': members
+    })
+
+@app.route('/get_barcode_image/sequence/<int:sequence_id>/<int:index>')
+def get_sequence_member_image(sequence_id, index):
+    """Render one member of a saved sequence on demand."""
+    sequence, error_response = sequence_for_request(sequence_id)
+    if error_response:
+        return error_response
+    member_error = sequence_member_error(sequence, index)
+    if member_error:
+        return member_error
+    
+    try:
+        barcode_id = materialized_members(sequence, [index]).get(index)
+        if barcode_id is not None:
+            return get_barcode_image(barcode_id)
+        return barcode_image_response(sequence.member(index))
+    except Exception as e:
+        app.logger.error(f"Error retrieving sequence member image: {str(e)}")
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+@app.route('/api/sequences/<int:sequence_id>/members/<int:index>/materialize', methods=['POST'])
+def materialize_sequence_member(sequence_id, index):
+    """Turn one sequence member into its own Barcode row, e.g. to make it dynamic."""
+    sequence, error_response = sequence_for_request(sequence_id)
+    if error_response:
+        return error_response
+    member_error = sequence_member_error(sequence, index)
+    if member_error:
+        return member_error
+    
+    data = MATERIALIZE_REQUEST.load(request)
+    is_dynamic = data['is_dynamic']
+    redirect_url = data['redirect_url']
+    if is_dynamic and not redirect_url:
+        return jsonify({'error': 'Redirect URL is required for dynamic barcodes', 'status': 'error'}), 400
+    
+    try:
+        member = BarcodeSequenceMember.query.filter_by(sequence_id=sequence.id, position=index).first()
+        barcode = db.session.get(Barcode, member.barcode_id) if member else None
+        if barcode is None:
+            barcode = Barcode(
+                data=sequence.member_data(index),
+                barcode_type=sequence.barcode_type,
+                filename=f"{sequence.barcode_type}_sequence{sequence.id}_{index}.png",
+                user_id=sequence.user_id
+            )
+            db.session.add(barcode)
+            db.session.flush()
+            if member:
+                member.barcode_id = barcode.id
+            else:
+                db.session.add(BarcodeSequenceMember(sequence_id=sequence.id, position=index, barcode_id=barcode.id))
+        
+        barcode.is_dynamic = is_dynamic
+        barcode.redirect_url = redirect_url
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error materializing sequence member: {str(e)}")
+        return jsonify({'error': f"Database error: {str(e)}", 'status': 'error'}), 500
+    
+    return jsonify({
+        'status': 'success',
+        'id': barcode.id,
+        'index': index,
+        'data': barcode.data,
+        'barcode_type': barcode.barcode_type,
+        'is_dynamic': barcode.is_dynamic,
+        'redirect_url': barcode.redirect_url,
+        'image_url': barcode_image_url(barcode.id)
+    })
+
+csrf.exempt(materialize_sequence_member)
+
+def prune_job_artifacts(max_age_days):
+    """Delete jobs finished more than max_age_days ago, with their files, and orphaned job directories.
+    
+    Returns (jobs removed, directories removed).
+    """
+    ensure_job_table()
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    expired = [job_id for (job_id,) in db.session.query(BulkJob.id).filter(
+        BulkJob.status.in_(('completed', 'failed')), BulkJob.finished_at < cutoff
+    )]
+    for start in range(0, len(expired), ZIP_QUERY_CHUNK_SIZE):
+        BulkJob.query.filter(BulkJob.id.in_(expired[start:start + ZIP_QUERY_CHUNK_SIZE])).delete(synchronize_session=False)
+    db.session.commit()
+    
+    jobs_dir = app.config['JOBS_DIR']
+    if not os.path.isdir(jobs_dir):
+        return len(expired), 0
+    known = {job_id for (job_id,) in db.session.query(BulkJob.id)}
+    directories = 0
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        if name not in known and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            directories += 1
+    return len(expired), directories
+
+@app.cli.command('prune-render-store')
+@click.option('--job-max-age-days', type=float, default=None,
+              help='Remove finished bulk jobs older than this (default JOB_ARTIFACT_MAX_AGE_DAYS).')
+def prune_render_store(job_max_age_days):
+    """Delete stored renders whose barcode or sequence rows no longer exist, and expired job artifacts."""
+    ensure_sequence_tables()
+    valid_ids = {unique_id for (unique_id,) in db.session.query(Barcode.unique_id)}
+    valid_ids.update(unique_id for (unique_id,) in db.session.query(BarcodeSequence.unique_id))
+    removed = render_store.prune(valid_ids)
+    print(f"Removed {removed} orphaned render file(s) from {render_store.root}")
+    
+    if job_max_age_days is None:
+        job_max_age_days = app.config['JOB_ARTIFACT_MAX_AGE_DAYS']
+    jobs, directories = prune_job_artifacts(job_max_age_days)
+    print(f"Removed {jobs} expired job(s) and {directories} job artifact folder(s) from {app.config['JOBS_DIR']}")
+
+@app.cli.command('ensure-schema')
+def ensure_schema_command():
+    """Create missing tables and indexes, e.g. the listing indexes on an older database."""
+    if ensure_schema(db.engine, db.metadata):
+        print("Database schema updated")
+    else:
+        print("Database schema already up to date")
+
 # Add run statement at the end of the file
 if __name__ == '__main__':
     app.run(debug=True) 
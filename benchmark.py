@@ -0,0 +1,332 @@
+"""In-process benchmarks for the render engine and the HTTP endpoints.
+
+Runs every case against the app through Flask's test client, with no
+server, and reports ops/sec, p50/p99 latency and the peak RSS of the
+process. Each case is timed in several repeats, and its ops/sec is the
+median of the repeats. Results are compared with benchmark_baseline.json,
+and the run fails when a case's median throughput drops by more than the
+threshold plus the spread its repeats showed when the baseline was
+recorded. That way a noisy case needs a larger drop to fail.
+
+    python benchmark.py                     # run everything, compare with the baseline
+    python benchmark.py --quick -k render   # fewer rounds, only cases matching "render"
+    python benchmark.py --save-baseline     # record this machine's numbers as the baseline
+
+Baselines only mean something on the machine that recorded them, so
+re-record after moving to new hardware.
+
+The app runs on a throwaway database and render directory. Rate limits
+and the render budget stay on, so every request pays for their checks,
+but every tier's limits are raised too high to be reached. The render
+cache is off (RENDER_CACHE_MAX_BYTES=0) so every op pays for a real
+render; set the variable to measure cached renders.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# A case regresses when its median ops/sec falls this far, plus the
+# baseline's spread, below the baseline
+DEFAULT_THRESHOLD = 0.20
+
+# Timed repeats per case; the median of their ops/sec is reported
+DEFAULT_REPEATS = 3
+
+# Rate limit and render budget for every tier, far above what a run uses
+PERMISSIVE_LIMIT = '1000000000 per hour'
+
+# Symbology: [(size label, data)]
+RENDER_CASES = {
+    'code128': [('short', 'ABC-12345'), ('long', 'SHIPMENT-2024-0000123456-WAREHOUSE-B-07')],
+    'code39': [('short', 'ABC-123'), ('long', 'PART-NUMBER-0000123456-REV-B')],
+    'ean13': [('fixed', '590123412345')],
+    'ean8': [('fixed', '9638507')],
+    'upca': [('fixed', '03600029145')],
+    'qrcode': [('short', 'https://example.com/p/12345'), ('long', 'https://example.com/?q=' + 'x' * 480)],
+}
+
+SEQUENCE_COUNTS = (10, 100, 1000)
+BULK_COUNTS = (100, 1000, 5000)
+
+# Left out of --quick runs
+SLOW_CASES = {'http/generate_sequence/1000', 'http/bulk_sequence/5000'}
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident set size, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(op, min_time, min_rounds, repeats=DEFAULT_REPEATS, max_rounds=100000):
+    """Time op() in repeats runs, each lasting at least min_time seconds and min_rounds calls.
+
+    ops_per_sec is the median of the runs' rates and spread is how far
+    apart the fastest and slowest runs were, relative to it.
+    """
+    op()  # warm-up: first-render imports, template and query compilation
+    samples = []
+    rates = []
+    for _ in range(repeats):
+        run = []
+        started = time.perf_counter()
+        while len(run) < max_rounds:
+            before = time.perf_counter()
+            op()
+            run.append(time.perf_counter() - before)
+            if len(run) >= min_rounds and time.perf_counter() - started >= min_time:
+                break
+        elapsed = sum(run)
+        rates.append(len(run) / elapsed if elapsed else 0.0)
+        samples.extend(run)
+    median = statistics.median(rates)
+    return {
+        'rounds': len(samples),
+        'ops_per_sec': median,
+        'spread': (max(rates) - min(rates)) / median if median else 0.0,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def load_app(workdir):
+    """Import the app against a scratch database and render directory."""
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(workdir, 'bench.db'))
+    os.environ.setdefault('RENDER_STORE_DIR', os.path.join(workdir, 'renders'))
+    os.environ.setdefault('JOBS_DIR', os.path.join(workdir, 'jobs'))
+    os.environ.setdefault('RATELIMIT_STORAGE_URI', 'memory://')
+    os.environ.setdefault('RATELIMIT_DEFAULT', PERMISSIVE_LIMIT)
+    os.environ.setdefault('RENDER_CACHE_MAX_BYTES', '0')
+    os.environ.setdefault('LOG_SAMPLE_RATE', '0')
+
+    import logging
+    from limits import parse_many
+    import app as application
+
+    application.app.config['WTF_CSRF_ENABLED'] = False
+    application.app.logger.setLevel(logging.ERROR)
+    # Limits stay on, so their checks are measured, but can't be reached
+    for tier in application.RATE_LIMIT_TIERS:
+        application.RATE_LIMIT_TIERS[tier] = PERMISSIVE_LIMIT
+        application.RENDER_BUDGETS[tier] = PERMISSIVE_LIMIT
+        application.RENDER_MAX_COSTS[tier] = parse_many(PERMISSIVE_LIMIT)[0].amount
+    with application.app.app_context():
+        application.db.create_all()
+    return application
+
+
+def expect_ok(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+class Owner:
+    """Logged-in stand-in for the user that owns the saved barcodes."""
+
+    is_authenticated = True
+    is_premium = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.encryption_key = 'benchmark'
+
+
+def build_cases(application):
+    """Return [(name, op)] for every benchmark case."""
+    from io import BytesIO
+
+    cases = []
+
+    for barcode_type, sizes in RENDER_CASES.items():
+        for size, data in sizes:
+            for output_format in ('png', 'svg'):
+                def render(data=data, barcode_type=barcode_type, output_format=output_format):
+                    buffer, error = application.generate_barcode_image(
+                        data, barcode_type, buffer=BytesIO(), output_format=output_format
+                    )
+                    if error:
+                        raise RuntimeError(error)
+                cases.append((f"render/{barcode_type}/{size}/{output_format}", render))
+
+    client = application.app.test_client()
+
+    def post(path, payload):
+        return lambda: expect_ok(client.post(path, json=payload))
+
+    cases.append(('http/generate_barcode', post('/generate_barcode', {'data': 'ABC-12345', 'barcode_type': 'code128'})))
+    cases.append(('http/generate_qrcode', post('/generate_qrcode', {'data': 'https://example.com/p/12345'})))
+    for count in SEQUENCE_COUNTS:
+        cases.append((f"http/generate_sequence/{count}", post('/generate_sequence', {
+            'prefix': 'SKU-', 'start': 1, 'count': count, 'pad_length': 6, 'barcode_type': 'code128'
+        })))
+    for count in BULK_COUNTS:
+        cases.append((f"http/bulk_sequence/{count}", post('/api/generate_bulk_sequence', {
+            'prefix': 'SKU-', 'start': 1, 'count': count, 'pad_length': 6, 'barcode_type': 'code128'
+        })))
+
+    # Image retrieval needs saved rows. There is no login route, so the owner
+    # is stood in for current_user while each of its requests runs.
+    with application.app.app_context():
+        user = application.User(username='benchmark', email='benchmark@example.com')
+        application.db.session.add(user)
+        application.db.session.commit()
+        owner = Owner(user.id)
+
+    def as_owner(request):
+        def op():
+            anonymous, application.current_user = application.current_user, owner
+            try:
+                return expect_ok(request())
+            finally:
+                application.current_user = anonymous
+        return op
+
+    saved = as_owner(lambda: client.post('/generate_barcode', json={
+        'data': 'ABC-12345', 'barcode_type': 'code128', 'save': True
+    }))().get_json()
+    image_path = f"/get_barcode_image/{saved['id']}"
+    cases.append(('http/get_barcode_image', as_owner(lambda: client.get(image_path))))
+
+    # Range-saved sequence members are rendered on demand rather than stored as rows
+    sequence = as_owner(lambda: client.post('/generate_sequence', json={
+        'prefix': 'SKU-', 'start': 1, 'count': 100, 'pad_length': 6,
+        'barcode_type': 'code128', 'save_to_system': True, 'save_mode': 'range'
+    }))().get_json()['sequence']
+    member_path = f"/get_barcode_image/sequence/{sequence['id']}/5"
+    cases.append(('http/get_sequence_member_image', as_owner(lambda: client.get(member_path))))
+
+    return cases
+
+
+def compare(results, baseline, threshold):
+    """Return [(name, change, allowed)] for cases whose median ops/sec fell too far below the baseline.
+
+    A case may drop by threshold plus the spread of its baseline repeats.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('cases', {}).get(name)
+        if not expected or not expected.get('ops_per_sec'):
+            continue
+        change = result['ops_per_sec'] / expected['ops_per_sec'] - 1
+        allowed = threshold + expected.get('spread', 0.0)
+        result['change'] = change
+        if change < -allowed:
+            regressions.append((name, change, allowed))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'case':<40} {'ops/sec':>10} {'spread':>7} {'p50 ms':>9} {'p99 ms':>9} {'rss MB':>8} {'vs base':>8}")
+    for name, result in results.items():
+        change = f"{result['change']:+.1%}" if 'change' in result else '-'
+        print(f"{name:<40} {result['ops_per_sec']:>10.2f} {result['spread']:>7.1%} {result['p50_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['peak_rss_mb']:>8.1f} {change:>8}")
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default='', help='only run cases whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='fewer rounds and no slow cases')
+    parser.add_argument('--min-time', type=float, default=None, help='seconds per repeat of each case (default 0.5)')
+    parser.add_argument('--min-rounds', type=int, default=None, help='calls per repeat at least (default 2)')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='timed repeats per case; the median is compared (default 3)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed median ops/sec drop, on top of the baseline spread (default 0.20)')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    min_time = args.min_time if args.min_time is not None else (0.1 if args.quick else 0.5)
+    min_rounds = args.min_rounds if args.min_rounds is not None else (1 if args.quick else 2)
+
+    workdir = tempfile.mkdtemp(prefix='barcode-bench-')
+    try:
+        application = load_app(workdir)
+        cases = build_cases(application)
+        results = {}
+        for name, op in cases:
+            if args.pattern not in name or (args.quick and name in SLOW_CASES):
+                continue
+            # Only direct renders get an app context: requests would reuse an
+            # outer one, and with it g, instead of starting their own
+            if name.startswith('render/'):
+                with application.app.app_context():
+                    results[name] = measure(op, min_time, min_rounds, max(1, args.repeats))
+            else:
+                results[name] = measure(op, min_time, min_rounds, max(1, args.repeats))
+        application.render_farm.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not results:
+        print(f"No benchmark case matches {args.pattern!r}")
+        return 2
+
+    regressions = []
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # A filtered run only replaces the cases it ran
+        baseline.setdefault('cases', {}).update({
+            name: {key: round(value, 6) for key, value in result.items() if key != 'rounds'}
+            for name, result in results.items()
+        })
+        baseline['machine'] = machine_info()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('machine') != machine_info():
+            print(f"Note: {args.baseline} was recorded on a different machine or Python")
+        regressions = compare(results, baseline, args.threshold)
+
+    print_table(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'machine': machine_info(), 'cases': results}, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        print(f"\nSaved {len(results)} case(s) to {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for name, change, allowed in regressions:
+            print(f"  {name}: {change:+.1%} ops/sec (allowed -{allowed:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Database connection settings shared by every entry point.
+
+The Flask app, the job workers and the Netlify functions all build their
+engines from here, so every SQLite connection gets the same PRAGMAs and
+each process keeps one pooled engine per database.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+DEFAULT_DATABASE_URI = 'sqlite:///barcode_v2.db'
+
+# Applied to every new SQLite connection, in this order
+SQLITE_PRAGMAS = (
+    # Readers keep reading while a bulk insert is writing
+    ('journal_mode', 'WAL'),
+    # With WAL this only syncs at checkpoints and is still corruption-safe
+    ('synchronous', 'NORMAL'),
+    # Negative values are KiB; the default is roughly 64 MB of page cache
+    ('cache_size', -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+    ('mmap_size', int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+    # Wait for the writer lock instead of failing with "database is locked"
+    ('busy_timeout', int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+    ('temp_store', 'MEMORY'),
+)
+
+# Connections kept open per engine; SQLite connections are cheap but not free
+POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 10))
+POOL_MAX_OVERFLOW = int(os.environ.get('SQLITE_POOL_MAX_OVERFLOW', 20))
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def database_uri(default=DEFAULT_DATABASE_URI):
+    """Return the configured database URI, falling back to the local SQLite file.
+
+    Only SQLALCHEMY_DATABASE_URI is read. Hosts such as Heroku set
+    DATABASE_URL to a postgres:// URL that SQLAlchemy does not accept.
+    """
+    return os.environ.get('SQLALCHEMY_DATABASE_URI') or default
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def is_memory_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri):
+    """Keyword arguments for create_engine (or SQLALCHEMY_ENGINE_OPTIONS) for uri."""
+    if not is_sqlite(uri):
+        return {'pool_pre_ping': True}
+    if is_memory_sqlite(uri):
+        # Every connection to :memory: is a separate database, so share exactly one
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    return {
+        'poolclass': QueuePool,
+        'pool_size': POOL_SIZE,
+        'max_overflow': POOL_MAX_OVERFLOW,
+        # Pooled connections move between request threads
+        'connect_args': {'check_same_thread': False},
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    """Tune a new SQLite connection. Safe to call on read-only databases."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            try:
+                cursor.execute(f"PRAGMA {name}={value}")
+            except sqlite3.OperationalError:
+                # e.g. journal_mode can't change on a read-only file
+                pass
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas(engine):
+    """Apply SQLITE_PRAGMAS to every connection engine opens from now on."""
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', apply_sqlite_pragmas):
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
+    return engine
+
+
+def get_engine(uri=None):
+    """Return this process's engine for uri, creating it on first use."""
+    uri = uri or database_uri()
+    with _engines_lock:
+        engine = _engines.get(uri)
+        if engine is None:
+            engine = _engines[uri] = install_sqlite_pragmas(create_engine(uri, **engine_options(uri)))
+        return engine
+
+
+def schema_fingerprint(metadata):
+    """Return a 31-bit hash of the CREATE statements for every table and index in metadata."""
+    dialect = sqlite_dialect.dialect()
+    ddl = []
+    for table in metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name or ''):
+            ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    # PRAGMA user_version holds a signed 32-bit integer
+    return int(hashlib.sha1('\n'.join(ddl).encode('utf-8')).hexdigest()[:8], 16) & 0x7FFFFFFF
+
+
+def ensure_schema(engine, metadata):
+    """Create missing tables and indexes unless the database is already stamped with this schema.
+
+    The fingerprint is kept in PRAGMA user_version, so a matching database
+    costs one PRAGMA read instead of a create_all round of table checks.
+    Returns True if DDL had to run.
+    """
+    fingerprint = schema_fingerprint(metadata)
+    with engine.connect() as connection:
+        if connection.exec_driver_sql('PRAGMA user_version').scalar() == fingerprint:
+            return False
+
+    metadata.create_all(engine)
+    # create_all only creates the indexes of tables it creates, so indexes
+    # added to an existing table are created here before the stamp
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    try:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f'PRAGMA user_version = {fingerprint}')
+    except OperationalError:
+        # Read-only databases with every table present still work, just unstamped
+        pass
+    return True
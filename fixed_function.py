@@ -82,30 +82,8 @@ def generate_sequence():
                 db.session.commit()
             encryption_key = current_user.encryption_key
         
-        for i in range(count):
-            current_number = start + i
-            
-            # Apply zero-padding if needed
-            if pad_length > 0:
-                number_str = str(current_number).zfill(pad_length)
-            else:
-                number_str = str(current_number)
-            
-            # Special handling for EAN and UPC barcode types
-            if barcode_type == 'ean13' and prefix == '' and suffix == '':
-                # For standalone EAN-13, pad to 12 digits (13th is check digit)
-                if len(number_str) < 12:
-                    number_str = number_str.zfill(12)
-            elif barcode_type == 'ean8' and prefix == '' and suffix == '':
-                # For standalone EAN-8, pad to 7 digits (8th is check digit)
-                if len(number_str) < 7:
-                    number_str = number_str.zfill(7)
-            elif barcode_type == 'upca' and prefix == '' and suffix == '':
-                # For standalone UPC-A, pad to 11 digits (12th is check digit)
-                if len(number_str) < 11:
-                    number_str = number_str.zfill(11)
-                
-            barcode_data = f"{prefix}{number_str}{suffix}"
+        # Members are built on demand, with the same padding rules as the app
+        for i, barcode_data in SequenceSpec(prefix, start, count, pad_length, suffix, barcode_type).items():
             filename = f"{barcode_type}_{timestamp}_{i}.png"
             
             # Validate the barcode data
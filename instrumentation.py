@@ -0,0 +1,223 @@
+"""Per-stage request timings, Server-Timing headers and Prometheus metrics.
+
+Code on the hot path wraps each stage in ``with stage('rasterize'):``.
+Inside a request the time is added to that request's totals. Nested
+stages are exclusive: a png_compress inside rasterize is not counted
+twice. Outside a request (job workers, warm-up) stage() does nothing
+but read a thread-local.
+
+When a request finishes, its per-stage totals go out in a Server-Timing
+header and are observed once each into process-wide histograms, which
+/metrics exposes in the Prometheus text format. A streamed body is
+produced after the headers are sent, so the header only covers the work
+before the stream; its histograms are observed at teardown, once the
+stream has finished. The per-item cost is one
+context manager and two perf_counter() calls. Locks are only taken once
+per stage per request.
+"""
+import bisect
+import random
+import threading
+import time
+
+# Stages in the order they are reported
+STAGES = ('parse', 'validate', 'encode', 'rasterize', 'png_compress', 'base64', 'db_write', 'serialize')
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class _RequestTimings:
+    __slots__ = ('started', 'totals', 'stack', 'log_sampled', 'streamed')
+
+    def __init__(self, log_sampled):
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.stack = []
+        self.log_sampled = log_sampled
+        # (endpoint, status) of a streamed response, observed at teardown
+        self.streamed = None
+
+
+class _Stage:
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.timings.stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        timings = self.timings
+        totals = timings.totals
+        timings.stack.pop()
+        totals[self.name] = totals.get(self.name, 0.0) + elapsed
+        if timings.stack:
+            # The enclosing stage keeps only its own time
+            parent = timings.stack[-1]
+            totals[parent] = totals.get(parent, 0.0) - elapsed
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """Context manager timing one stage of the current request."""
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        return _NO_STAGE
+    return _Stage(name, timings)
+
+
+def log_sampled():
+    """True if this request's verbose log lines should be written.
+
+    Decided once per request, so a sampled request logs all of its lines.
+    """
+    timings = getattr(_local, 'timings', None)
+    return timings is not None and timings.log_sampled
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label value."""
+
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then sum
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for label_value, counts, total in snapshot:
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total!r}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Instrumentation:
+    """Collects stage timings for every request of a Flask app."""
+
+    def __init__(self, app=None, log_sample_rate=0.01):
+        self.log_sample_rate = log_sample_rate
+        self.stage_seconds = Histogram('barcode_request_stage_seconds',
+                                       'Time spent in each stage of a request.', 'stage')
+        self.request_seconds = Histogram('barcode_request_seconds',
+                                         'Time from request start to the end of the response body.', 'endpoint')
+        self._responses = {}
+        self._responses_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.log_sample_rate = app.config.get('LOG_SAMPLE_RATE', self.log_sample_rate)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._clear)
+
+        # JSON bodies are built in the provider, so time it there
+        respond = app.json.response
+
+        def timed_response(*args, **kwargs):
+            with stage('serialize'):
+                return respond(*args, **kwargs)
+        app.json.response = timed_response
+
+    def _start(self):
+        rate = self.log_sample_rate
+        _local.timings = _RequestTimings(rate >= 1 or (rate > 0 and random.random() < rate))
+
+    def _finish(self, response):
+        from flask import request
+
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return response
+        total = time.perf_counter() - timings.started
+        totals = timings.totals
+
+        metrics = [f"{name};dur={totals[name] * 1000:.3f}" for name in STAGES if name in totals]
+        metrics.extend(f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items() if name not in STAGES)
+        metrics.append(f"total;dur={total * 1000:.3f}")
+        response.headers['Server-Timing'] = ', '.join(metrics)
+
+        endpoint = request.endpoint or 'unmatched'
+        if response.is_streamed:
+            # The body's stages run after this hook, inside the stream
+            timings.streamed = (endpoint, response.status_code)
+        else:
+            self._observe(timings, endpoint, response.status_code, total)
+        return response
+
+    def _observe(self, timings, endpoint, status, total):
+        for name, seconds in timings.totals.items():
+            self.stage_seconds.observe(name, max(seconds, 0.0))
+        self.request_seconds.observe(endpoint, total)
+        key = (endpoint, status)
+        with self._responses_lock:
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def _clear(self, exc=None):
+        timings = getattr(_local, 'timings', None)
+        if timings is not None and timings.streamed is not None:
+            # Teardown waits for stream_with_context bodies, so the stream is done
+            self._observe(timings, *timings.streamed, time.perf_counter() - timings.started)
+        _local.timings = None
+
+    def metrics_text(self, gauges=None):
+        """All metrics in the Prometheus text exposition format.
+
+        gauges maps extra metric names to (help text, value).
+        """
+        lines = self.stage_seconds.expose() + self.request_seconds.expose()
+        lines += ['# HELP barcode_responses_total Responses sent, by endpoint and status.',
+                  '# TYPE barcode_responses_total counter']
+        with self._responses_lock:
+            responses = sorted(self._responses.items())
+        for (endpoint, status), count in responses:
+            lines.append(f'barcode_responses_total{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,73 @@
+"""JSON provider backed by orjson, with Flask's stdlib provider as the fallback.
+
+orjson encodes and decodes several times faster than the json module,
+which matters for sequence responses that carry megabytes of base64
+images. Output stays compatible with Flask's provider: keys are sorted,
+dates use the HTTP date format, and anything orjson can't encode (for
+example integers wider than 64 bits) is retried with the json module.
+orjson would decode such integers as floats, so documents with a run of
+20 or more digits are decoded by the json module, which keeps them exact.
+"""
+import re
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# orjson keeps integers up to 2**64 - 1 (20 digits) exact and turns wider
+# ones into floats; any run of 20 digits might be one of those
+_WIDE_NUMBER = re.compile(r'\d{20}')
+_WIDE_NUMBER_BYTES = re.compile(rb'\d{20}')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Drop-in replacement for DefaultJSONProvider that prefers orjson."""
+
+    def _options(self, indent=False):
+        # Dates go through Flask's default() so they keep the HTTP date format
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize obj to UTF-8 JSON bytes."""
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        except TypeError:
+            kwargs = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for json-module options get exactly that
+        if kwargs and set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        if (_WIDE_NUMBER if isinstance(s, str) else _WIDE_NUMBER_BYTES).search(s):
+            return super().loads(s)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # Let the json module raise its own error, or accept what orjson is stricter about
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def json_provider_class(name):
+    """Provider class for JSON_PROVIDER: 'orjson' (when installed) or 'default'."""
+    if name == 'orjson' and orjson is not None:
+        return OrjsonProvider
+    return DefaultJSONProvider
@@ -1,49 +1,136 @@
 import sys
 import os
+import json
+import time
 
-# Add the parent directory to sys.path to import the Flask app
+_module_start = time.perf_counter()
+
+# Add the repository root to sys.path to import the Flask app
 current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(parent_dir)
 sys.path.append(current_dir)  # Add current directory to path to find db_helper
 
-# Import the database helper and init modules
-import db_helper
-from init_db import init_db
+# Loaded by the first invocation and kept for every warm invocation after it
+_app = None
+_handle_request = None
+_write_flags = None
+
+# Endpoints that always write, whatever the request body says
+WRITE_ENDPOINTS = {'materialize_sequence_member'}
+
+# Invocation counts and summed milliseconds, split by cold and warm starts
+LATENCY_STATS = {
+    'cold': {'count': 0, 'app_load_ms': 0.0, 'handle_ms': 0.0},
+    'warm': {'count': 0, 'app_load_ms': 0.0, 'handle_ms': 0.0}
+}
+
+def reject_writes():
+    """Refuse requests that would write to the read-only bundled database."""
+    from flask import jsonify, request
+    from request_schema import RequestSchema, boolean
+
+    global _write_flags
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return None
+    if _write_flags is None:
+        # Saving, and queueing a bulk job, both insert rows
+        _write_flags = RequestSchema(save=boolean(False), save_to_system=boolean(False), **{'async': boolean(False)})
+    flags = _write_flags.load(request)
+    if request.endpoint in WRITE_ENDPOINTS or any(flags[name] for name in _write_flags.fields):
+        return jsonify({
+            'error': 'Saving is disabled: this deployment serves a read-only database (NETLIFY_DB_MODE=readonly)',
+            'status': 'error'
+        }), 503
+    return None
+
+def load_app():
+    """
+    Import and initialize the Flask app on first use.
+
+    Importing this module stays cheap; Flask, SQLAlchemy and the rest of the
+    app are only loaded when a request arrives. The render libraries are
+    loaded later still, by the first request that draws an image, and then
+    stay resident with the app.
+    """
+    global _app, _handle_request
+    if _app is not None:
+        return _app
 
-# Set environment variables for configuration
-# For a real application, you should set these in the Netlify dashboard
-if 'NETLIFY' in os.environ:
-    # This is just a placeholder - in a real app, you'd set these in Netlify's environment variables
-    os.environ['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'temporary_netlify_secret_key')
-    
-    # Set the database URI using our helper
-    os.environ['SQLALCHEMY_DATABASE_URI'] = db_helper.get_db_path()
+    import db_helper
 
-# Import the Flask app after setting env vars
-from app import app
+    # Set environment variables for configuration
+    # For a real application, you should set these in the Netlify dashboard
+    if 'NETLIFY' in os.environ:
+        # This is just a placeholder - in a real app, you'd set these in Netlify's environment variables
+        os.environ['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'temporary_netlify_secret_key')
 
-# Initialize the database if running in Netlify
-if 'NETLIFY' in os.environ:
-    try:
-        init_db()
-    except Exception as e:
-        print(f"Error initializing database: {str(e)}")
+        # Set the database URI using our helper
+        os.environ['SQLALCHEMY_DATABASE_URI'] = db_helper.get_db_path()
 
-# Import serverless_wsgi handler
-from serverless_wsgi import handle_request
+    # Skip warming every symbology up front; each one loads on its first render
+    os.environ.setdefault('RENDER_WARM_ON_IMPORT', 'false')
+    # Each function instance is its own process, so there is nothing to share counters with
+    os.environ.setdefault('RATELIMIT_STORAGE_URI', 'memory://')
+
+    # Import the Flask app after setting env vars
+    phase_start = time.perf_counter()
+    from app import app
+    from init_db import init_db
+    from serverless_wsgi import handle_request
+    db_helper.record_phase('import_app', phase_start)
+
+    if db_helper.is_read_only():
+        app.before_request(reject_writes)
+
+    # Initialize the database if running in Netlify
+    if 'NETLIFY' in os.environ:
+        try:
+            init_db()
+        except Exception as e:
+            print(f"Error initializing database: {str(e)}")
+
+    _app, _handle_request = app, handle_request
+    return _app
 
 def handler(event, context):
     """
     AWS Lambda / Netlify Function handler for the Flask app
     """
-    # Print debug information
-    print(f"Handler received event: {event}")
-    return handle_request(app, event, context)
+    started = time.perf_counter()
+    cold = _app is None
+    app = load_app()
+    loaded = time.perf_counter()
+
+    response = _handle_request(app, event, context)
+    finished = time.perf_counter()
+
+    kind = 'cold' if cold else 'warm'
+    stats = LATENCY_STATS[kind]
+    stats['count'] += 1
+    stats['app_load_ms'] += (loaded - started) * 1000
+    stats['handle_ms'] += (finished - loaded) * 1000
+
+    # One compact line per invocation instead of the whole event
+    timing = {
+        'start': kind,
+        'path': event.get('path') if isinstance(event, dict) else None,
+        'status': response.get('statusCode') if isinstance(response, dict) else None,
+        'app_load_ms': round((loaded - started) * 1000, 2),
+        'handle_ms': round((finished - loaded) * 1000, 2)
+    }
+    if cold:
+        import db_helper
+        timing['module_init_ms'] = MODULE_INIT_MS
+        timing['phases_ms'] = db_helper.BOOTSTRAP_TIMINGS
+    print(json.dumps(timing))
+    return response
 
 # Netlify specific function configuration
 handler.config = {
     "runtime": "python3.9",
     "memory": 1024,
     "timeout": 10
-} 
\ No newline at end of file
+}
+
+MODULE_INIT_MS = round((time.perf_counter() - _module_start) * 1000, 2)
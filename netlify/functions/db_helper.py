@@ -1,55 +1,87 @@
 import os
-import sqlite3
-from sqlalchemy import create_engine
+import sys
+import time
 from sqlalchemy.orm import scoped_session, sessionmaker
 import tempfile
 import shutil
 
+# The repository root holds db_config, shared with the Flask app
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from db_config import get_engine
+
 # Determine if we're running in a Netlify Function environment
 IS_NETLIFY = 'NETLIFY' in os.environ
 
+# The database deployed with the function bundle
+BUNDLED_DB = os.path.join(ROOT_DIR, 'barcode_v2.db')
+
+# 'copy' copies the bundled database to the temp dir so the function can
+# write (writes are lost with the container); 'readonly' serves the bundle
+# in place and write requests are refused with 503
+DB_MODE = os.environ.get('NETLIFY_DB_MODE', 'copy')
+
+# Milliseconds spent in each cold-start phase of this process
+BOOTSTRAP_TIMINGS = {}
+
+# One session factory per process, bound to the shared engine
+_session = None
+
+def record_phase(name, started):
+    """Record how long a cold-start phase took, the first time it runs."""
+    BOOTSTRAP_TIMINGS.setdefault(name, round((time.perf_counter() - started) * 1000, 2))
+
+def is_read_only():
+    """True if the bundled database is served read-only."""
+    return IS_NETLIFY and DB_MODE == 'readonly' and os.path.exists(BUNDLED_DB)
+
 def get_db_path():
     """
     Get the appropriate database path based on environment.
     
-    In Netlify Functions, we need to use a temporary directory
-    since the deployment environment has a read-only filesystem.
+    In Netlify Functions the deployment filesystem is read-only, so by
+    default a database in the temp directory is used. With
+    NETLIFY_DB_MODE=readonly the bundled database is opened read-only and
+    immutable instead, which needs no copy, journal or locking.
     """
     if IS_NETLIFY:
-        # For Netlify, use a temp directory
-        temp_dir = tempfile.gettempdir()
-        db_path = os.path.join(temp_dir, 'barcode_v2.db')
-        
-        # If the database doesn't exist in the temp directory,
-        # initialize it (in a real application, you'd want to connect
-        # to a proper database service instead)
-        if not os.path.exists(db_path):
-            # Check if there's a source DB file in the repo and copy it to temp
-            source_db = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'barcode_v2.db')
-            if os.path.exists(source_db):
+        started = time.perf_counter()
+        if is_read_only():
+            uri = f'sqlite:///file:{BUNDLED_DB}?mode=ro&immutable=1&uri=true'
+        else:
+            # For Netlify, use a temp directory
+            db_path = os.path.join(tempfile.gettempdir(), 'barcode_v2.db')
+            
+            # Copy mode seeds the temp database from the bundle once per container;
+            # without a bundle init_db creates an empty schema instead
+            if DB_MODE == 'copy' and not os.path.exists(db_path) and os.path.exists(BUNDLED_DB):
                 try:
-                    shutil.copy(source_db, db_path)
-                except:
-                    # If we can't copy, we'll create a new DB
+                    shutil.copy(BUNDLED_DB, db_path)
+                except OSError:
                     pass
-                    
-        # Return the SQLAlchemy URI for the temp database
-        return f'sqlite:///{db_path}'
+            uri = f'sqlite:///{db_path}'
+        record_phase('db_path', started)
+        return uri
     else:
         # For local development, use the original path
         return 'sqlite:///barcode_v2.db'
 
 def get_db_engine():
     """
-    Create and return a SQLAlchemy engine with proper configuration
-    for the current environment.
+    Return the process-wide SQLAlchemy engine for the current environment.
+    
+    The engine is created once, with the pool and SQLite PRAGMAs from
+    db_config, and reused by every later call.
     """
-    return create_engine(get_db_path())
+    return get_engine(get_db_path())
 
 def get_db_session():
     """
-    Create and return a SQLAlchemy scoped session.
+    Return the process-wide SQLAlchemy scoped session.
     """
-    engine = get_db_engine()
-    session_factory = sessionmaker(bind=engine)
-    return scoped_session(session_factory) 
\ No newline at end of file
+    global _session
+    if _session is None:
+        _session = scoped_session(sessionmaker(bind=get_db_engine()))
+    return _session 
\ No newline at end of file
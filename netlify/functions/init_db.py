@@ -6,24 +6,31 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
 sys.path.append(parent_dir)
 
+import time
+
 from app import db
-from db_helper import get_db_path
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from db_config import ensure_schema
+from db_helper import get_db_engine, get_db_path, record_phase
 
 def init_db():
     """
     Initialize the database with all models from the app.
     This should be called when running in the Netlify Functions environment
     to ensure the database tables exist.
+    
+    DDL only runs when the schema fingerprint stored in the database differs
+    from the models. Run this file directly to stamp the bundled database.
     """
-    # Create engine with the path from our helper
-    engine = create_engine(get_db_path())
+    started = time.perf_counter()
     
-    # Create all tables
-    db.metadata.create_all(engine)
+    # Use the shared engine for the path from our helper
+    created = ensure_schema(get_db_engine(), db.metadata)
+    record_phase('schema', started)
     
-    print(f"Database initialized at {get_db_path()}")
+    if created:
+        print(f"Database initialized at {get_db_path()}")
     
-    return True 
\ No newline at end of file
+    return True
+
+if __name__ == '__main__':
+    init_db() 
\ No newline at end of file
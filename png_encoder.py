@@ -0,0 +1,59 @@
+"""Minimal PNG encoder for monochrome module matrices (QR codes)."""
+import struct
+import zlib
+
+from instrumentation import stage
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _chunk(chunk_type, data):
+    return (
+        struct.pack('>I', len(data))
+        + chunk_type
+        + data
+        + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_matrix_png(matrix, box_size=10, compress_level=9):
+    """Encode a matrix of dark (truthy) / light modules as a 1-bit grayscale PNG.
+
+    Each module becomes a box_size x box_size square. Rows are expanded by
+    building the whole scanline as one bit string and converting it to
+    bytes in a single int() call, and identical module rows are packed only
+    once, so no image object is ever allocated.
+    """
+    if not matrix:
+        raise ValueError("Cannot encode an empty matrix")
+
+    width = len(matrix[0]) * box_size
+    height = len(matrix) * box_size
+    row_bytes = (width + 7) // 8
+    padding = '1' * (row_bytes * 8 - width)
+
+    # Dark modules are black (bit 0), light modules are white (bit 1)
+    dark = '0' * box_size
+    light = '1' * box_size
+
+    packed_rows = {}
+    raw = []
+    with stage('rasterize'):
+        for row in matrix:
+            key = tuple(row)
+            scanline = packed_rows.get(key)
+            if scanline is None:
+                bits = ''.join([dark if module else light for module in row]) + padding
+                # Filter type 0 (None) prefixes every scanline
+                scanline = b'\x00' + int(bits, 2).to_bytes(row_bytes, 'big')
+                packed_rows[key] = scanline
+            raw.append(scanline * box_size)
+
+    header = struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)
+    with stage('png_compress'):
+        return b''.join((
+            PNG_SIGNATURE,
+            _chunk(b'IHDR', header),
+            _chunk(b'IDAT', zlib.compress(b''.join(raw), compress_level)),
+            _chunk(b'IEND', b''),
+        ))
@@ -0,0 +1,398 @@
+"""Shared rate-limit storage for running several workers behind one limiter.
+
+Importing this module registers two extra schemes with ``limits``:
+
+* ``sqlite:///path/to/rate_limits.db`` keeps the counters in a local SQLite
+  file, so every worker process on the host shares one budget.
+* ``fastpath+redis://host:port/db`` (and ``fastpath+rediss://``) is the
+  stock Redis storage from ``limits`` plus the local fast path below, for
+  workers spread over several hosts.
+
+Both use the sliding-window counter: two fixed windows per limit, the
+previous one weighted by how much of it still overlaps the sliding window.
+A worker that sees a key rejected remembers until when it must stay
+rejected and refuses further hits locally until then, so a client hammering
+a spent limit costs no storage round-trips. Accepted hits are leased in
+batches: one round-trip reserves several hits, and the worker hands them
+out locally until the batch is spent or its window ends. Near the limit
+workers stop batching, and hits a worker leased but never handed out are
+given back to the storage.
+"""
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+from limits.storage.redis import RedisStorage
+
+# Expired counters are swept after this many writes per process
+SQLITE_PURGE_EVERY = 1000
+
+# Blocked keys remembered per process before the oldest are dropped
+FAST_PATH_MAX_KEYS = 10000
+
+# Hits a worker reserves per storage round-trip, and the largest share of a
+# limit one worker may hold unused; limits under 1 / FAST_PATH_LEASE_SHARE
+# hits are never leased
+FAST_PATH_LEASE_HITS = 10
+FAST_PATH_LEASE_SHARE = 0.1
+
+# Workers sharing one storage (across every host for Redis); a key is only
+# leased while its remaining hits cover a batch for each of them
+FAST_PATH_WORKERS = int(os.environ.get('RATELIMIT_WORKERS') or os.environ.get('WEB_CONCURRENCY')
+                        or os.cpu_count() or 1)
+
+
+class LocalFastPath:
+    """Lease sliding-window hits in batches and refuse spent keys without a round-trip.
+
+    An accepted hit reserves up to FAST_PATH_LEASE_HITS hits in the shared
+    storage, and later hits on the key are served from that lease. Reserved
+    hits count in the window they were taken in, so they are only handed out
+    until that window ends. A worker never admits more than the storage
+    granted. A key is only leased while its remaining hits cover a batch for
+    each of the FAST_PATH_WORKERS workers; below that every worker takes
+    exactly the hits it admits for the rest of the window, so no worker sits
+    on hits another one needs. Hits left in a lease when it is dropped are
+    given back to the window they were taken from.
+
+    A rejected key is only blocked until the earliest moment a cost-1 hit
+    could pass given the counts the storage returned, so the fast path never
+    refuses a hit the shared storage would have accepted; hits from other
+    workers only push that moment later.
+    """
+
+    def _blocked_keys(self):
+        blocked = getattr(self, '_blocked', None)
+        if blocked is None or self._blocked_pid != os.getpid():
+            blocked = self._blocked = {}
+            # key -> [hits left, window end, expiry, lease time]
+            self._leases = {}
+            self._leases_lock = threading.Lock()
+            self._blocked_pid = os.getpid()
+        return blocked
+
+    def _take_leased(self, key, amount):
+        """Spend amount hits of key's lease; False if the lease can't cover them."""
+        with self._leases_lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                return False
+            if time.time() >= lease[1]:
+                del self._leases[key]
+            elif lease[0] < amount:
+                # Too few left for this hit; keep them for cheaper ones
+                return False
+            else:
+                lease[0] -= amount
+                if not lease[0]:
+                    del self._leases[key]
+                return True
+        self._give_back(key, lease)
+        return False
+
+    def _give_back(self, key, lease):
+        """Return the unused hits of a dropped lease to the window they were taken from."""
+        hits, window_ends, expiry, leased_at = lease
+        now = time.time()
+        # A window stops counting one expiry after it ends
+        if not hits or now >= window_ends + expiry:
+            return
+        try:
+            self._return_hits(key, expiry, leased_at, now >= window_ends, hits)
+        except self.base_exceptions:
+            # The hits just stay spent until their window expires
+            pass
+
+    def _return_hits(self, key, expiry, leased_at, ended, hits):
+        # Window keys are named after their start time, so the lease's window is found at any time
+        self.decr(self.sliding_window_keys(key, expiry, leased_at)[1], hits)
+
+    def _keep_lease(self, key, hits, window_ends, expiry, now):
+        dropped = []
+        with self._leases_lock:
+            leases = self._leases
+            if len(leases) >= FAST_PATH_MAX_KEYS:
+                for stale in [k for k, v in leases.items() if v[1] <= now] or list(leases)[:len(leases) // 2]:
+                    dropped.append((stale, leases.pop(stale)))
+            lease = leases.get(key)
+            if lease is not None and lease[1] > now:
+                # Another thread leased concurrently; keep both batches
+                lease[0] += hits
+                lease[1] = min(lease[1], window_ends)
+            else:
+                leases[key] = [hits, window_ends, expiry, now]
+        for stale, lease in dropped:
+            self._give_back(stale, lease)
+
+    def _lease(self, key, limit, expiry, amount):
+        """Reserve a batch of hits for key; True if amount of them were granted."""
+        batch = max(amount, min(FAST_PATH_LEASE_HITS, int(limit * FAST_PATH_LEASE_SHARE)))
+        now = time.time()
+        with self._leases_lock:
+            # An empty lease marks a window already too close to the limit to batch
+            lease = self._leases.get(key)
+            suspended = lease is not None and lease[1] > now
+        if batch == amount or suspended:
+            return super().acquire_sliding_window_entry(key, limit, expiry, amount)
+
+        previous_count, previous_ttl, current_count, current_ttl = self.get_sliding_window(key, expiry)
+        remaining = limit - floor(previous_count * previous_ttl / expiry + current_count)
+        # The reserved hits belong to the current window, so they lapse when it rolls over
+        if current_ttl > expiry:
+            window_ends = now + current_ttl - expiry
+        else:
+            # Redis opens the next window with this hit, ending when the old key would have expired
+            window_ends = now + (current_ttl or expiry)
+        if remaining < FAST_PATH_WORKERS * batch:
+            self._keep_lease(key, 0, window_ends, expiry, now)
+            return super().acquire_sliding_window_entry(key, limit, expiry, amount)
+        if not super().acquire_sliding_window_entry(key, limit, expiry, batch):
+            # Other workers got there first; ask for exactly this hit
+            return super().acquire_sliding_window_entry(key, limit, expiry, amount)
+
+        self._keep_lease(key, batch - amount, window_ends, expiry, now)
+        return True
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        blocked = self._blocked_keys()
+        # Leased hits were already granted, so they pass even while the key is blocked
+        if self._take_leased(key, amount):
+            self.fast_path_hits = getattr(self, 'fast_path_hits', 0) + 1
+            return True
+        until = blocked.get(key)
+        if until is not None:
+            if time.time() < until:
+                self.fast_path_hits = getattr(self, 'fast_path_hits', 0) + 1
+                return False
+            blocked.pop(key, None)
+
+        if self._lease(key, limit, expiry, amount):
+            return True
+
+        previous_count, previous_ttl, current_count, current_ttl = self.get_sliding_window(key, expiry)
+        # The current window only empties when it rolls over into the previous one
+        wait = current_ttl - expiry
+        if current_count < limit:
+            if not previous_count:
+                # Only this hit's cost was too large; a cheaper one could pass now
+                return False
+            wait = min(wait, previous_ttl - (limit - current_count) * expiry / previous_count)
+        if wait > 0:
+            if len(blocked) >= FAST_PATH_MAX_KEYS:
+                now = time.time()
+                for stale in [k for k, v in blocked.items() if v <= now] or list(blocked)[:len(blocked) // 2]:
+                    blocked.pop(stale, None)
+            blocked[key] = time.time() + wait
+        return False
+
+    def clear(self, key):
+        self._blocked_keys().pop(key, None)
+        with self._leases_lock:
+            self._leases.pop(key, None)
+        super().clear(key)
+
+    def reset(self):
+        self._blocked_keys().clear()
+        with self._leases_lock:
+            self._leases.clear()
+        return super().reset()
+
+
+class SQLiteCounterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Fixed and sliding-window counters in a SQLite file shared by every local worker.
+
+    Each sliding-window hit reads both windows and bumps the current one
+    inside a single BEGIN IMMEDIATE transaction, so concurrent processes
+    can never both take the last slot.
+    """
+
+    def __init__(self, uri, wrap_exceptions=False, timeout=5.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # Same layout as SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        path = uri.split('://', 1)[1]
+        self.path = path[1:] if path.startswith('/') else path
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_counter ('
+                'key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'connection', None) is None or local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection())
+
+    def _bump(self, connection, key, expires_at, now, amount, elastic=False):
+        connection.execute(
+            'INSERT INTO rate_limit_counter (key, count, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            'count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, '
+            'expires_at = CASE WHEN expires_at <= ? OR ? THEN excluded.expires_at ELSE expires_at END',
+            (key, amount, expires_at, now, now, bool(elastic))
+        )
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            connection.execute('DELETE FROM rate_limit_counter WHERE expires_at <= ?', (now,))
+
+    def _counts(self, connection, keys, now):
+        placeholders = ', '.join('?' * len(keys))
+        rows = connection.execute(
+            f'SELECT key, count, expires_at FROM rate_limit_counter '
+            f'WHERE key IN ({placeholders}) AND expires_at > ?',
+            (*keys, now)
+        ).fetchall()
+        return {key: (count, expires_at) for key, count, expires_at in rows}
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        with self._transaction() as connection:
+            self._bump(connection, key, now + expiry, now, amount, elastic_expiry)
+            return self._counts(connection, [key], now)[key][0]
+
+    def decr(self, key, amount=1):
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE rate_limit_counter SET count = MAX(count - ?, 0) WHERE key = ?', (amount, key)
+            )
+
+    def get(self, key):
+        return self._counts(self._connection(), [key], time.time()).get(key, (0, 0))[0]
+
+    def get_expiry(self, key):
+        now = time.time()
+        return self._counts(self._connection(), [key], now).get(key, (0, now))[1]
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as connection:
+            return connection.execute('DELETE FROM rate_limit_counter').rowcount
+
+    def clear(self, key):
+        # Also drop the per-window keys the sliding-window counter stores under key
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM rate_limit_counter WHERE key = ? OR (key >= ? AND key < ?)",
+                (key, key + '/', key + '0')
+            )
+
+    def _sliding_window(self, connection, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        counts = self._counts(connection, [previous_key, current_key], now)
+        previous_count = counts.get(previous_key, (0, 0))[0]
+        current_count = counts.get(current_key, (0, 0))[0]
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as connection:
+            current_key, previous_count, previous_ttl, current_count, _ = self._sliding_window(
+                connection, key, expiry, now
+            )
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            self._bump(connection, current_key, now + 2 * expiry, now, amount)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window(self._connection(), key, expiry, time.time())[1:]
+
+
+class _ImmediateTransaction:
+    """Take the SQLite write lock up front so read-modify-write can't interleave."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+class SQLiteStorage(LocalFastPath, SQLiteCounterStorage):
+    """SQLite counters with the local fast path; the ``sqlite://`` scheme."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+
+class FastPathRedisStorage(LocalFastPath, RedisStorage):
+    """The stock Redis storage with the local fast path; ``fastpath+redis://``.
+
+    Anything speaking the Redis protocol works, and a local stand-in can be
+    plugged in through the ``connection_pool`` storage option.
+    """
+
+    STORAGE_SCHEME = ['fastpath+redis', 'fastpath+rediss', 'fastpath+redis+unix']
+
+    def __init__(self, uri, **options):
+        super().__init__(uri[len('fastpath+'):], **options)
+
+    def initialize_storage(self, uri):
+        super().initialize_storage(uri)
+        self.lua_return_hits = self.get_connection().register_script(REDIS_RETURN_HITS)
+
+    def _return_hits(self, key, expiry, leased_at, ended, hits):
+        previous_key = self.prefixed_key(self._previous_window_key(key))
+        current_key = self.prefixed_key(self._current_window_key(key))
+        self.lua_return_hits([previous_key, current_key], [hits, expiry, int(ended)])
+
+
+# Redis keeps the current and previous window under fixed keys and renames
+# the current one on the first hit after it ends, so a window that has ended
+# is in the current key until that rename and in the previous key after it
+REDIS_RETURN_HITS = """
+local hits = tonumber(ARGV[1])
+local expiry = tonumber(ARGV[2]) * 1000
+local key = KEYS[2]
+if ARGV[3] == '1' then
+    local current_ttl = tonumber(redis.call('pttl', KEYS[2]))
+    if not (current_ttl > 0 and current_ttl < expiry) then
+        key = KEYS[1]
+    end
+end
+if redis.call('exists', key) == 1 and redis.call('decrby', key, hits) < 0 then
+    redis.call('set', key, 0, 'KEEPTTL')
+end
+"""
+
+
+def default_storage_uri(instance_path):
+    """Shared SQLite counters next to the app's other instance files."""
+    return 'sqlite:///' + os.path.join(os.path.abspath(instance_path), 'rate_limits.db')
@@ -0,0 +1,86 @@
+"""In-process LRU cache for rendered barcode images."""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def make_render_key(barcode_data, barcode_type, **options):
+    """Build a content-addressed cache key from a normalized render spec.
+
+    The key is a digest of the symbology, the encoded data and every output
+    option that changes the rendered bytes, so two requests that would
+    produce the same image always share a key.
+    """
+    parts = [barcode_type, barcode_data]
+    for name in sorted(options):
+        parts.append(f"{name}={options[name]}")
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe LRU cache of image bytes bounded by a total byte budget."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_item_bytes=None):
+        self.max_bytes = max(0, int(max_bytes))
+        # A single huge render should never flush the whole cache
+        self.max_item_bytes = max_item_bytes if max_item_bytes is not None else self.max_bytes // 8
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss."""
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used entries as needed."""
+        size = len(value)
+        if not self.enabled or size > self.max_item_bytes:
+            return False
+
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+
+            self._items[key] = value
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._items),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
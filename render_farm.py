@@ -0,0 +1,145 @@
+"""Process pool that spreads large batches of renders across every CPU core."""
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from symbology import symbologies
+
+
+def _init_worker(png_compress_level):
+    symbologies.png_compress_level = png_compress_level
+    symbologies.warm()
+
+
+def render_chunk(barcode_type, output_format, items):
+    """Render (index, data) pairs and return (index, image bytes, error) tuples.
+
+    This runs inside the worker processes, so only the chunk of strings goes
+    in and only the encoded image bytes come back.
+    """
+    results = []
+    for index, data in items:
+        buffer = BytesIO()
+        try:
+            symbologies.render(data, barcode_type, buffer, output_format)
+            results.append((index, buffer.getvalue(), None))
+        except Exception as e:
+            results.append((index, None, str(e)))
+    return results
+
+
+def _process_context():
+    """Start method for the pool's processes.
+
+    A web worker already runs threads (group commit, the rate limiter's
+    storage, request threads), and fork would copy their locks mid-use. A
+    fork server starts clean, loads the render libraries once and forks
+    workers from that; spawn is the fallback where it isn't available.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Only this module, not the web app that happens to be __main__
+        context.set_forkserver_preload(['render_farm'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class RenderFarm:
+    """Lazily started pool of render worker processes shared by a web worker."""
+
+    def __init__(self, workers=None, min_items=64, max_chunk_size=256):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.min_items = min_items
+        self.max_chunk_size = max_chunk_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 1
+
+    def should_use(self, item_count):
+        """Small batches are cheaper to render inline than to ship to another process."""
+        return self.enabled and item_count >= self.min_items
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_process_context(),
+                    initializer=_init_worker,
+                    initargs=(symbologies.png_compress_level,),
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def chunk_size(self, item_count):
+        # About four chunks per worker keeps every core busy without huge messages
+        size = -(-item_count // (self.workers * 4))
+        return max(8, min(self.max_chunk_size, size))
+
+    def render(self, items, barcode_type, output_format='png'):
+        """Render (index, data) pairs, yielding (index, data, image bytes, error) in input order.
+
+        At most two chunks per worker are in flight, so memory stays bounded
+        however slowly the caller consumes results. If the pool can't be
+        started or dies, the affected chunks are rendered in this process.
+        """
+        items = list(items)
+        size = self.chunk_size(len(items))
+        chunks = deque(items[start:start + size] for start in range(0, len(items), size))
+
+        try:
+            executor = self._get_executor()
+        except (OSError, ValueError, NotImplementedError):
+            # No usable multiprocessing here (e.g. no /dev/shm on serverless runtimes)
+            executor = None
+            self.workers = 1
+
+        in_flight = deque()
+        while chunks or in_flight:
+            while executor is not None and chunks and len(in_flight) < self.workers * 2:
+                chunk = chunks.popleft()
+                try:
+                    future = executor.submit(render_chunk, barcode_type, output_format, chunk)
+                except (BrokenProcessPool, RuntimeError):
+                    chunks.appendleft(chunk)
+                    executor = None
+                    self._reset_executor()
+                    break
+                in_flight.append((chunk, future))
+
+            if in_flight:
+                chunk, future = in_flight.popleft()
+                try:
+                    results = future.result()
+                except (BrokenProcessPool, CancelledError):
+                    results = render_chunk(barcode_type, output_format, chunk)
+                    executor = None
+                    self._reset_executor()
+            else:
+                chunk = chunks.popleft()
+                results = render_chunk(barcode_type, output_format, chunk)
+
+            for (index, data), (_, image, error) in zip(chunk, results):
+                yield index, data, image, error
+
+    def shutdown(self):
+        self._reset_executor()
+
+
+def create_render_farm(workers=None, min_items=64):
+    farm = RenderFarm(workers=workers, min_items=min_items)
+    atexit.register(farm.shutdown)
+    return farm
@@ -0,0 +1,107 @@
+"""Persistent on-disk store for rendered images of saved barcodes."""
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+# Barcode.unique_id values are uuid4 strings; anything else never touches the disk
+_UNIQUE_ID_RE = re.compile(r'^[0-9a-fA-F-]{1,64}$')
+
+# Half-written temp files younger than this may still belong to a put() in progress
+TEMP_FILE_GRACE_SECONDS = 3600
+
+
+class RenderStore:
+    """Write-once image files keyed by Barcode.unique_id plus render options.
+
+    Files are sharded by the first two characters of the unique id so a
+    single directory never holds every render.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _filename(self, unique_id, options):
+        if not _UNIQUE_ID_RE.match(unique_id or ''):
+            raise ValueError(f"Invalid unique id: {unique_id!r}")
+        options = dict(options)
+        extension = options.pop('format', 'png')
+        if options:
+            spec = '&'.join(f"{name}={options[name]}" for name in sorted(options))
+            variant = '-' + hashlib.sha1(spec.encode('utf-8')).hexdigest()[:12]
+        else:
+            variant = ''
+        return os.path.join(self.root, unique_id[:2], f"{unique_id}{variant}.{extension}")
+
+    def get(self, unique_id, **options):
+        """Return the path of a stored render, or None if it hasn't been written yet."""
+        path = self._filename(unique_id, options)
+        return path if os.path.exists(path) else None
+
+    def put(self, unique_id, data, **options):
+        """Atomically write data for unique_id and return the file path."""
+        path = self._filename(unique_id, options)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file first so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def delete(self, unique_id):
+        """Remove every stored variant of unique_id. Returns the number of files removed."""
+        if not _UNIQUE_ID_RE.match(unique_id or ''):
+            return 0
+        directory = os.path.join(self.root, unique_id[:2])
+        if not os.path.isdir(directory):
+            return 0
+
+        # Exactly unique_id plus an optional variant, so deleting member "-1" keeps "-10"
+        own_file = re.compile(re.escape(unique_id) + r'(-[0-9a-f]{12})?\.[a-z0-9]+$')
+        removed = 0
+        for name in os.listdir(directory):
+            if own_file.match(name):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def prune(self, valid_unique_ids):
+        """Delete files whose unique id is not in valid_unique_ids."""
+        if not os.path.isdir(self.root):
+            return 0
+
+        removed = 0
+        stale_before = time.time() - TEMP_FILE_GRACE_SECONDS
+        for shard in os.listdir(self.root):
+            directory = os.path.join(self.root, shard)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith('.tmp'):
+                    # Leave temp files of concurrent writes alone; only clear abandoned ones
+                    try:
+                        if os.path.getmtime(os.path.join(directory, name)) >= stale_before:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                # uuid4 strings are 36 characters; the variant suffix follows
+                elif name[:36] in valid_unique_ids:
+                    continue
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
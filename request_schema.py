@@ -0,0 +1,117 @@
+"""Declarative request schemas for the generate endpoints.
+
+A schema lists each field with its coercer and default once, at import
+time. Parsing a request is then one body decode and one pass over the
+compiled fields. Coercion is lenient, matching the endpoints' historical
+behaviour: a value that can't be converted falls back to its default
+instead of failing the request, and range checks stay in the endpoint
+so each can keep its own error message.
+"""
+from instrumentation import stage
+
+_MISSING = object()
+
+
+def request_body(request):
+    """Return the JSON object or form fields sent with request, or {}.
+
+    JSON goes through the app's JSON provider and is cached on the
+    request, so repeated calls (rate-limit cost, then the view) parse once.
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+    elif request.form:
+        body = request.form.to_dict()
+    elif request.data:
+        body = request.get_json(force=True, silent=True)
+    else:
+        body = None
+    return body if isinstance(body, dict) else {}
+
+
+class Field:
+    """One request field: a coercer applied to the raw value, and a default.
+
+    coerce(value) returns the converted value or raises ValueError or
+    TypeError, in which case the field takes its default. A callable
+    default is called for every request, for mutable defaults.
+    """
+
+    def __init__(self, default=None, coerce=None):
+        self.default = default
+        self.coerce = coerce
+
+    def compile(self):
+        coerce, default = self.coerce, self.default
+        fresh = default if callable(default) else (lambda: default)
+
+        if coerce is None:
+            def parse(value):
+                return fresh() if value is _MISSING or value is None else value
+        else:
+            def parse(value):
+                if value is _MISSING or value is None:
+                    return fresh()
+                try:
+                    return coerce(value)
+                except (ValueError, TypeError):
+                    return fresh()
+        return parse
+
+
+def _to_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() == 'true'
+    return bool(value)
+
+
+def text(default=''):
+    return Field(default, _to_text)
+
+
+def integer(default=0, maximum=None):
+    """An int field; values above maximum are clamped to it."""
+    if maximum is None:
+        return Field(default, int)
+    return Field(default, lambda value: min(int(value), maximum))
+
+
+def boolean(default=False):
+    """A flag that is true for True, 1 or the string 'true' in any case."""
+    return Field(default, _to_bool)
+
+
+def mapping(default=dict):
+    def to_dict(value):
+        if not isinstance(value, dict):
+            raise TypeError('expected an object')
+        return value
+    return Field(default, to_dict)
+
+
+class RequestSchema:
+    """Named fields compiled once, then applied to every request.
+
+    load() returns the whole request body with every schema field
+    present and coerced, so helpers that read other keys (format,
+    response_format, stream) keep working on the same dict.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self._parsers = tuple((name, field.compile()) for name, field in fields.items())
+
+    def parse(self, body):
+        values = dict(body)
+        get = body.get
+        for name, parse in self._parsers:
+            values[name] = parse(get(name, _MISSING))
+        return values
+
+    def load(self, request):
+        with stage('parse'):
+            return self.parse(request_body(request))
@@ -0,0 +1,270 @@
+"""Plan every member of a numeric barcode sequence before anything is rendered.
+
+A sequence is prefix + zero-padded counter + suffix. Within a run of
+counters that print with the same number of characters, every member has
+the same length, and the same characters outside the counter. So length
+and charset are checked once per run instead of once per member.
+
+For EAN-13, EAN-8 and UPC-A the check digits of a whole run are computed
+together. The digits of each member, read as one integer, grow by a fixed
+step, so a run is a range() of integers. Each check digit then costs a few
+lookups in a table of weighted digit sums, with no per-digit string work.
+python-barcode appends the check digit itself when it is left off. When a
+member already carries one it has to be correct; otherwise python-barcode
+would quietly print a different number.
+"""
+from instrumentation import stage
+
+# Characters python-barcode's Code 39 can encode (it upper-cases input first)
+CODE39_CHARSET = frozenset(' $%+-./0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# Symbology: (label, digits before the check digit)
+CHECK_DIGIT_SYMBOLOGIES = {
+    'ean13': ('EAN-13', 12),
+    'ean8': ('EAN-8', 7),
+    'upca': ('UPC-A', 11),
+}
+
+_block_weights = None
+
+
+def _weighted_block_sums():
+    """Weighted digit sums (3, 1, 3, 1 from the right) of every 4-digit block.
+
+    Blocks have an even width, so every block of a longer number uses
+    the same weights and a 12-digit sum is three lookups.
+    """
+    global _block_weights
+    if _block_weights is None:
+        sums = []
+        for block in range(10000):
+            total, weight = 0, 3
+            while block:
+                block, digit = divmod(block, 10)
+                total += digit * weight
+                weight = 4 - weight
+            sums.append(total)
+        _block_weights = tuple(sums)
+    return _block_weights
+
+
+def check_digits(payloads):
+    """EAN/UPC check digits for an iterable of payloads given as integers."""
+    table = _weighted_block_sums()
+    return [
+        -(table[x % 10000] + table[x // 10000 % 10000] + table[x // 100000000 % 10000]) % 10
+        for x in payloads
+    ]
+
+
+def check_digit(payload):
+    return check_digits((int(payload),))[0]
+
+
+def _charset_error(text, barcode_type):
+    """Return why barcode_type can't encode text's characters, or ''."""
+    if barcode_type in CHECK_DIGIT_SYMBOLOGIES:
+        if not (text.isascii() and text.isdigit()):
+            return f"{CHECK_DIGIT_SYMBOLOGIES[barcode_type][0]} can only contain digits"
+    elif barcode_type == 'code39':
+        invalid = sorted({char for char in text if char.upper() not in CODE39_CHARSET})
+        if invalid:
+            return f"Code 39 cannot encode: {', '.join(invalid)}"
+    elif barcode_type != 'qrcode':
+        # Unknown symbologies fall back to Code 128, which covers 7-bit ASCII
+        invalid = sorted({char for char in text if ord(char) > 127})
+        if invalid:
+            return f"Code 128 cannot encode: {', '.join(invalid)}"
+    return ''
+
+
+def validate_value(value, barcode_type, verify_check_digit=True):
+    """Check one barcode value the way a sequence plan checks each member.
+
+    Without verify_check_digit a full-length EAN/UPC value passes whatever
+    its last digit is, and python-barcode prints the computed one instead.
+    Returns (valid, error_message).
+    """
+    if not value:
+        return False, "Barcode data is required"
+    error = _charset_error(value, barcode_type)
+    if error:
+        return False, error
+    if barcode_type in CHECK_DIGIT_SYMBOLOGIES:
+        label, digits = CHECK_DIGIT_SYMBOLOGIES[barcode_type]
+        if len(value) not in (digits, digits + 1):
+            return False, f"{label} must be {digits} or {digits + 1} digits"
+        if len(value) == digits + 1 and verify_check_digit:
+            expected = check_digit(value[:digits])
+            if int(value[-1]) != expected:
+                return False, f"Invalid {label} check digit (expected {expected})"
+    return True, ""
+
+
+def counter_width(prefix, pad_length, suffix, barcode_type):
+    """Minimum printed width of the counter.
+
+    A bare EAN/UPC counter is padded up to the digits before the check digit.
+    """
+    if prefix == '' and suffix == '' and barcode_type in CHECK_DIGIT_SYMBOLOGIES:
+        return max(pad_length, CHECK_DIGIT_SYMBOLOGIES[barcode_type][1])
+    return max(pad_length, 0)
+
+
+def _printed_length_bounds(number):
+    """The closed interval of numbers that print with as many characters as number."""
+    digits = len(str(abs(number)))
+    if number < 0:
+        # -999..-100 print with 4 characters, -99..-10 with 3, ...
+        return -(10 ** digits - 1), -(10 ** (digits - 1)) if digits > 1 else -1
+    return (10 ** (digits - 1) if digits > 1 else 0), 10 ** digits - 1
+
+
+def _equal_length_runs(numbers):
+    """Split a range of counters into sub-ranges whose numbers print with equal length."""
+    index = 0
+    while index < len(numbers):
+        low, high = _printed_length_bounds(numbers[index])
+        if numbers.step > 0:
+            steps = (high - numbers[index]) // numbers.step
+        else:
+            steps = (numbers[index] - low) // -numbers.step
+        end = min(len(numbers), index + steps + 1)
+        yield index, numbers[index:end]
+        index = end
+
+
+class SequencePlan:
+    """Every member value of a sequence, split into valid members and failures."""
+
+    def __init__(self, values, valid, failures):
+        self.values = values
+        # (index, value) pairs ready to render or save, in index order
+        self.valid = valid
+        # {'index', 'data', 'error'} entries, in index order
+        self.failures = failures
+
+
+class SequenceSpec:
+    """A prefix/counter/suffix sequence whose members are built on demand.
+
+    Indexing, len() and slicing are O(1): a slice is another SequenceSpec
+    over a sub-range of the counters, so a client can ask for members
+    40,000 to 40,100 of a huge sequence without building the ones before
+    them. Members keep their position in the full sequence, which is the
+    index reported by items() and plan().
+    """
+
+    def __init__(self, prefix='', start=1, count=0, pad_length=0, suffix='', barcode_type='code128'):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.pad_length = pad_length
+        self.barcode_type = barcode_type
+        self.numbers = range(start, start + max(count, 0))
+        self.positions = range(len(self.numbers))
+        self._spec = self._format_spec()
+
+    def _format_spec(self):
+        width = counter_width(self.prefix, self.pad_length, self.suffix, self.barcode_type)
+        return f"0{width}d" if width else 'd'
+
+    def _value(self, number):
+        return self.prefix + format(number, self._spec) + self.suffix
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            page = object.__new__(SequenceSpec)
+            page.__dict__.update(self.__dict__)
+            page.numbers = self.numbers[key]
+            page.positions = self.positions[key]
+            return page
+        return self._value(self.numbers[key])
+
+    def __iter__(self):
+        return map(self._value, self.numbers)
+
+    def __repr__(self):
+        return (f"SequenceSpec(prefix={self.prefix!r}, numbers={self.numbers!r}, "
+                f"pad_length={self.pad_length}, suffix={self.suffix!r}, barcode_type={self.barcode_type!r})")
+
+    def page(self, offset=0, limit=None):
+        """Members offset to offset + limit (the rest of the sequence without a limit)."""
+        return self[offset:] if limit is None else self[offset:offset + limit]
+
+    def position(self, index):
+        """Position in the full sequence of this spec's member index."""
+        return self.positions[index]
+
+    def items(self):
+        """(position, value) for every member."""
+        return zip(self.positions, self)
+
+    def plan(self):
+        """Build and validate every member without rendering any."""
+        with stage('validate'):
+            return self._plan()
+
+    def _plan(self):
+        prefix, suffix, barcode_type = self.prefix, self.suffix, self.barcode_type
+        affix_error = _charset_error(prefix + suffix, barcode_type) if prefix or suffix else ''
+
+        values = []
+        valid = []
+        failures = []
+        for offset, numbers in _equal_length_runs(self.numbers):
+            positions = self.positions[offset:offset + len(numbers)]
+            run = [self._value(number) for number in numbers]
+            values.extend(run)
+
+            error = affix_error
+            if not error and numbers[0] < 0:
+                error = _charset_error(run[0], barcode_type)
+            if not error and barcode_type in CHECK_DIGIT_SYMBOLOGIES:
+                error = _check_run_error(run, numbers, prefix, suffix, barcode_type)
+
+            if isinstance(error, str):
+                if error:
+                    failures.extend({'index': position, 'data': value, 'error': error}
+                                    for position, value in zip(positions, run))
+                else:
+                    valid.extend(zip(positions, run))
+                continue
+
+            # Per-member errors: only some check digits in the run were wrong
+            for position, value, member_error in zip(positions, run, error):
+                if member_error:
+                    failures.append({'index': position, 'data': value, 'error': member_error})
+                else:
+                    valid.append((position, value))
+
+        return SequencePlan(values, valid, failures)
+
+
+def _check_run_error(run, numbers, prefix, suffix, barcode_type):
+    """Length and check-digit errors for a run of EAN/UPC members.
+
+    Returns one error string for the whole run ('' when every member is
+    fine), or a list with one error string per member.
+    """
+    label, digits = CHECK_DIGIT_SYMBOLOGIES[barcode_type]
+    length = len(run[0])
+    if length not in (digits, digits + 1):
+        return f"{label} must be {digits} or {digits + 1} digits"
+    if length == digits:
+        # python-barcode adds the check digit
+        return ''
+
+    # Every member is int(prefix) * scale + number * step + int(suffix)
+    counter_length = length - len(prefix) - len(suffix)
+    step = 10 ** len(suffix)
+    base = int(prefix or 0) * 10 ** (counter_length + len(suffix)) + int(suffix or 0)
+    members = range(base + numbers.start * step, base + numbers.stop * step, numbers.step * step)
+    expected = check_digits(member // 10 for member in members)
+    errors = [
+        '' if member % 10 == digit else f"Invalid {label} check digit (expected {digit})"
+        for member, digit in zip(members, expected)
+    ]
+    return errors if any(errors) else ''
@@ -1021,14 +1021,29 @@ document.addEventListener('DOMContentLoaded', function() {
     /*************************************************************
      * Barcode History
     *************************************************************/
-    function loadBarcodeHistory() {
-        axios.get('/api/get_barcodes')
+    // The API returns one page at a time; the next page is fetched with next_cursor
+    // when the user asks for more. Range-saved sequences come with the first page.
+    const HISTORY_PAGE_SIZE = 100;
+
+    function fetchBarcodePage(cursor) {
+        const params = { limit: HISTORY_PAGE_SIZE };
+        if (cursor) {
+            params.cursor = cursor;
+        }
+        return axios.get('/api/get_barcodes', { params: params })
             .then(function(response) {
-                if (response && response.data && response.data.barcodes) {
-                    displayBarcodeHistory(response.data.barcodes);
-                } else {
-                    console.error('No data received from history API');
+                const data = response && response.data;
+                if (!data || !data.barcodes) {
+                    throw new Error('No data received from history API');
                 }
+                return data;
+            });
+    }
+
+    function loadBarcodeHistory(cursor) {
+        fetchBarcodePage(cursor)
+            .then(function(page) {
+                displayBarcodeHistory(page.barcodes, page.sequences, page.next_cursor, Boolean(cursor));
             })
             .catch(function(error) {
                 console.error('Error loading barcode history:', error);
@@ -1036,14 +1051,20 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Display barcode history with improved layout
-    function displayBarcodeHistory(barcodes) {
+    function displayBarcodeHistory(barcodes, sequences, nextCursor, append) {
         const historyContainer = window.safeDOM.getElement('history_list');
         if (!historyContainer) return;
         
-        // Clear previous results
-        historyContainer.innerHTML = '';
+        // Clear previous results, or just the old "Load more" button when adding a page
+        const oldLoadMore = window.safeDOM.getElement('history_load_more');
+        if (oldLoadMore) {
+            oldLoadMore.remove();
+        }
+        if (!append) {
+            historyContainer.innerHTML = '';
+        }
         
-        if (!barcodes || !barcodes.length) {
+        if (!append && (!barcodes || !barcodes.length) && (!sequences || !sequences.length)) {
             const emptyMessage = document.createElement('p');
             emptyMessage.className = 'text-gray-600 dark:text-gray-300 text-center py-8';
             emptyMessage.textContent = 'No barcode history found.';
@@ -1108,6 +1129,70 @@ document.addEventListener('DOMContentLoaded', function() {
             
             historyContainer.appendChild(card);
         });
+        
+        // Range-saved sequences: first member image and a ZIP of every member
+        (sequences || []).forEach(sequence => {
+            const card = document.createElement('div');
+            card.className = 'bg-white dark:bg-gray-700 rounded-lg overflow-hidden shadow hover:shadow-lg transition-shadow mb-4';
+            
+            const header = document.createElement('div');
+            header.className = 'bg-gray-50 dark:bg-gray-800 px-4 py-2 border-b dark:border-gray-600';
+            
+            const title = document.createElement('h3');
+            title.className = 'text-gray-800 dark:text-white font-medium';
+            title.textContent = `${(sequence.barcode_type || 'barcode').toUpperCase()} SEQUENCE (${sequence.count})`;
+            
+            const content = document.createElement('div');
+            content.className = 'p-4';
+            
+            const image = document.createElement('img');
+            image.src = sequence.first_image_url;
+            image.alt = sequence.first_data || '';
+            image.className = 'mx-auto mb-3';
+            
+            const dataText = document.createElement('p');
+            dataText.className = 'text-sm text-gray-600 dark:text-gray-300 mb-2 text-center';
+            dataText.textContent = `${sequence.first_data || ''} to ${sequence.last_data || ''}`;
+            
+            const footer = document.createElement('div');
+            footer.className = 'flex justify-between items-center mt-3';
+            
+            const date = document.createElement('span');
+            date.className = 'text-xs text-gray-500 dark:text-gray-400';
+            date.textContent = sequence.created_at ? new Date(sequence.created_at).toLocaleDateString() : 'Unknown date';
+            
+            const downloadLink = document.createElement('a');
+            downloadLink.href = `/api/barcodes/download-zip?sequence_id=${sequence.id}`;
+            downloadLink.className = 'text-primary-600 hover:text-primary-800 text-sm font-medium';
+            downloadLink.textContent = 'Download ZIP';
+            
+            footer.appendChild(date);
+            footer.appendChild(downloadLink);
+            
+            header.appendChild(title);
+            content.appendChild(image);
+            content.appendChild(dataText);
+            content.appendChild(footer);
+            
+            card.appendChild(header);
+            card.appendChild(content);
+            
+            historyContainer.appendChild(card);
+        });
+        
+        if (nextCursor) {
+            const loadMore = document.createElement('button');
+            loadMore.id = 'history_load_more';
+            loadMore.type = 'button';
+            loadMore.className = 'block mx-auto my-4 px-4 py-2 bg-primary-600 hover:bg-primary-700 text-white rounded-lg text-sm font-medium';
+            loadMore.textContent = 'Load more';
+            loadMore.addEventListener('click', function() {
+                loadMore.disabled = true;
+                loadMore.textContent = 'Loading...';
+                loadBarcodeHistory(nextCursor);
+            });
+            historyContainer.appendChild(loadMore);
+        }
     }
 
     // Load history when the history tab is clicked
@@ -190,8 +190,9 @@ document.addEventListener('DOMContentLoaded', function() {
         resultsContainer.innerHTML = `
             <div class="loading-spinner flex justify-center items-center p-8">
                 <div class="animate-spin rounded-full h-12 w-12 border-b-2 border-primary-600"></div>
-                <span class="ml-3 text-gray-700 dark:text-gray-300">Generating barcodes...</span>
+                <span id="bulk-progress-label" class="ml-3 text-gray-700 dark:text-gray-300">Generating barcodes...</span>
             </div>
+            <div id="bulk-stream-preview" class="grid grid-cols-2 md:grid-cols-4 lg:grid-cols-6 gap-2"></div>
         `;
         
         // Get all sequence configurations
@@ -226,22 +227,10 @@ document.addEventListener('DOMContentLoaded', function() {
         if (hasRangePattern) {
             console.log(`Sending range string to API: ${rangeString}`);
             // Send data to API with range string
-            fetch('/api/generate_bulk_sequence', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    range_string: rangeString,
-                    barcode_type: barcodeType,
-                    save_to_system: isUserLoggedIn
-                })
-            })
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error('API request failed');
-                }
-                return response.json();
+            fetchBarcodeStream({
+                range_string: rangeString,
+                barcode_type: barcodeType,
+                save_to_system: isUserLoggedIn
             })
             .then(data => {
                 console.log('API response:', data);
@@ -302,21 +291,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
         
         // Send data to API
-        fetch('/api/generate_bulk_sequence', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                sequences: sequenceBatch,
-                save_to_system: isUserLoggedIn
-            })
-        })
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('API request failed');
-            }
-            return response.json();
+        fetchBarcodeStream({
+            sequences: sequenceBatch,
+            save_to_system: isUserLoggedIn
         })
         .then(data => {
             // The API returns status 'success' instead of a boolean success property
@@ -351,6 +328,85 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Request barcodes as an NDJSON stream and show each one as it arrives.
+    // Resolves with the same shape as the non-streaming JSON response.
+    function fetchBarcodeStream(payload) {
+        return fetch('/api/generate_bulk_sequence', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/x-ndjson'
+            },
+            body: JSON.stringify(Object.assign({}, payload, { stream: true }))
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('API request failed');
+            }
+            
+            const barcodes = [];
+            let summary = null;
+            
+            const handleLine = line => {
+                if (!line.trim()) {
+                    return;
+                }
+                const item = JSON.parse(line);
+                if (item.type === 'summary') {
+                    summary = item;
+                    return;
+                }
+                barcodes.push(item);
+                showStreamProgress(item, barcodes.length);
+            };
+            
+            const finish = () => Object.assign({ status: 'error', error: 'Incomplete response' }, summary, { barcodes: barcodes });
+            
+            // Older browsers without readable streams still get the whole body at once
+            if (!response.body || typeof TextDecoder === 'undefined') {
+                return response.text().then(text => {
+                    text.split('\n').forEach(handleLine);
+                    return finish();
+                });
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let pending = '';
+            
+            const pump = () => reader.read().then(({ done, value }) => {
+                if (done) {
+                    handleLine(pending);
+                    return finish();
+                }
+                pending += decoder.decode(value, { stream: true });
+                const lines = pending.split('\n');
+                pending = lines.pop();
+                lines.forEach(handleLine);
+                return pump();
+            });
+            
+            return pump();
+        });
+    }
+    
+    // Update the loading state with a streamed barcode
+    function showStreamProgress(barcode, count) {
+        const label = document.getElementById('bulk-progress-label');
+        if (label) {
+            label.textContent = `Generated ${count} barcodes...`;
+        }
+        
+        const preview = document.getElementById('bulk-stream-preview');
+        if (preview) {
+            const img = document.createElement('img');
+            img.src = barcode.image_data || barcode.image_url;
+            img.alt = `Barcode: ${barcode.data}`;
+            img.className = 'max-w-full h-auto border border-gray-200 dark:border-gray-700 rounded p-1';
+            preview.appendChild(img);
+        }
+    }
+    
     // Display the results of bulk sequence generation
     function displayResults(data) {
         if (!data.sequences || data.sequences.length === 0) {
@@ -0,0 +1,304 @@
+"""Registry of barcode symbologies with warm, reusable rendering state.
+
+Everything that is expensive to set up per render - library imports, the
+ImageWriter instance and its TrueType fonts - is created once per worker
+(writers once per thread) and reused by every render afterwards.
+
+python-barcode, qrcode and PIL are only imported by the first render (or
+warm()), so processes that never draw an image don't pay for them.
+"""
+import importlib
+import threading
+import time
+
+from instrumentation import stage
+from png_encoder import encode_matrix_png
+
+_warm_image_writer = None
+
+
+def warm_image_writer_class():
+    """Return WarmImageWriter, defining it on first use."""
+    global _warm_image_writer
+    if _warm_image_writer is not None:
+        return _warm_image_writer
+
+    from barcode.writer import ImageWriter, mm2px, pt2mm
+    from PIL import ImageFont
+
+    class WarmImageWriter(ImageWriter):
+        """ImageWriter that keeps its fonts loaded instead of reopening the TTF per render."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._fonts = {}
+
+        def get_font(self, font_size):
+            key = (self.font_path, font_size)
+            font = self._fonts.get(key)
+            if font is None:
+                font = self._fonts[key] = ImageFont.truetype(self.font_path, font_size)
+            return font
+
+        def _paint_text(self, xpos, ypos):
+            font = self.get_font(int(mm2px(pt2mm(self.font_size), self.dpi)))
+            for subtext in self.text.split("\n"):
+                pos = (
+                    mm2px(xpos, self.dpi),
+                    mm2px(ypos, self.dpi),
+                )
+                self._draw.text(pos, subtext, font=font, fill=self.foreground, anchor="md")
+                ypos += pt2mm(self.font_size) / 2 + self.text_line_distance
+
+    _warm_image_writer = WarmImageWriter
+    return WarmImageWriter
+
+
+def __getattr__(name):
+    if name == 'WarmImageWriter':
+        return warm_image_writer_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Render costs are expressed relative to this symbology and format
+COST_REFERENCE = ('code128', 'png')
+
+# Timed renders needed before a measured cost factor replaces the estimate
+COST_SAMPLE_MIN = 50
+
+
+class SymbologyRegistry:
+    """Dispatch table from symbology name and output format to a renderer.
+
+    A renderer is called as renderer(data, buffer, registry) and writes the
+    encoded image into buffer.
+    """
+
+    def __init__(self, default='code128', png_compress_level=9):
+        self.default = default
+        # zlib level for PNGs the registry encodes itself (QR codes)
+        self.png_compress_level = png_compress_level
+        self._renderers = {}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.renders = 0
+        self.setup_seconds = 0.0
+        self.render_seconds = 0.0
+        self.warmed = False
+        # Relative render cost per (name, format); a Code128 PNG is 1.0
+        self._cost_factors = {}
+        # (name, format) -> [renders, seconds], for measured cost factors
+        self._timings = {}
+        # python-barcode class name -> class, imported on first use
+        self._barcode_classes = {}
+
+    def register(self, name, renderer, output_format='png', cost_factor=1.0):
+        """Register (or replace) the renderer for a symbology and output format.
+
+        cost_factor is the expected render time relative to a Code128 PNG and
+        is used until enough renders have been timed to measure it.
+        """
+        self._renderers[(name, output_format)] = renderer
+        self._cost_factors[(name, output_format)] = cost_factor
+
+    def formats(self):
+        return sorted({fmt for _, fmt in self._renderers})
+
+    def names(self, output_format='png'):
+        return sorted(name for name, fmt in self._renderers if fmt == output_format)
+
+    def resolve(self, name, output_format='png'):
+        """Return the registered name for a symbology, falling back to the default."""
+        return name if (name, output_format) in self._renderers else self.default
+
+    def barcode_class(self, name):
+        """Return the python-barcode class called name, importing the package on first use."""
+        barcode_class = self._barcode_classes.get(name)
+        if barcode_class is None:
+            barcode_class = self._barcode_classes[name] = getattr(importlib.import_module('barcode'), name)
+        return barcode_class
+
+    def writer(self, output_format='png'):
+        """Return this thread's reusable python-barcode writer for output_format."""
+        attribute = f"{output_format}_writer"
+        writer = getattr(self._local, attribute, None)
+        if writer is None:
+            if output_format == 'svg':
+                from barcode.writer import SVGWriter
+                writer = SVGWriter()
+            else:
+                writer = warm_image_writer_class()()
+            setattr(self._local, attribute, writer)
+        return writer
+
+    def render(self, data, name, buffer, output_format='png'):
+        """Encode data with the named symbology and write the image into buffer."""
+        started = time.perf_counter()
+        renderer = self._renderers[(self.resolve(name, output_format), output_format)]
+        dispatched = time.perf_counter()
+        renderer(data, buffer, self)
+        finished = time.perf_counter()
+
+        with self._stats_lock:
+            self.renders += 1
+            self.setup_seconds += dispatched - started
+            self.render_seconds += finished - dispatched
+            timing = self._timings.setdefault((self.resolve(name, output_format), output_format), [0, 0.0])
+            timing[0] += 1
+            timing[1] += finished - dispatched
+        return buffer
+
+    def cost_factor(self, name, output_format='png'):
+        """Render time of name in output_format relative to a Code128 PNG.
+
+        Measured from this process's own renders once both have been timed
+        COST_SAMPLE_MIN times, so the factor follows the CPU actually spent;
+        the registered estimate until then.
+        """
+        key = (self.resolve(name, output_format), output_format)
+        with self._stats_lock:
+            timing = self._timings.get(key)
+            reference = self._timings.get(COST_REFERENCE)
+            if (timing and reference and timing[0] >= COST_SAMPLE_MIN
+                    and reference[0] >= COST_SAMPLE_MIN and reference[1] > 0):
+                return (timing[1] / timing[0]) / (reference[1] / reference[0])
+        return self._cost_factors.get(key, 1.0)
+
+    def warm(self):
+        """Load fonts, PIL plugins and writer defaults before the first request."""
+        if self.warmed:
+            return
+        import barcode
+        from barcode.writer import mm2px, pt2mm
+
+        writer = self.writer()
+        default_font_size = barcode.base.Barcode.default_writer_options.get('font_size', 10)
+        writer.get_font(int(mm2px(pt2mm(default_font_size), writer.dpi)))
+
+        # One throwaway render per symbology pulls in the PNG encoder and lookup tables
+        samples = {'ean13': '590123412345', 'ean8': '9638507', 'upca': '03600029145'}
+        for name, output_format in list(self._renderers):
+            sink = _NullBuffer()
+            try:
+                self._renderers[(name, output_format)](samples.get(name, '12345'), sink, self)
+            except Exception:
+                pass
+        self.warmed = True
+
+    def stats(self):
+        with self._stats_lock:
+            renders = self.renders
+            return {
+                'symbologies': self.names(),
+                'renders': renders,
+                'avg_setup_us': round(self.setup_seconds / renders * 1e6, 2) if renders else 0.0,
+                'avg_render_ms': round(self.render_seconds / renders * 1e3, 3) if renders else 0.0,
+                'warmed': self.warmed,
+            }
+
+
+class _NullBuffer:
+    """Write sink used while warming up renderers."""
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def linear_renderer(barcode_class, output_format='png', **barcode_kwargs):
+    """Build a renderer for a python-barcode symbology using the thread's warm writer.
+
+    barcode_class may be the class itself or its name in the barcode package,
+    which the registry then looks up at render time.
+    """
+    def render(data, buffer, registry):
+        code_class = registry.barcode_class(barcode_class) if isinstance(barcode_class, str) else barcode_class
+        # Same steps as Barcode.write(), split so each one is timed on its own
+        with stage('encode'):
+            code = code_class(data, registry.writer(output_format), **barcode_kwargs)
+        with stage('rasterize'):
+            image = code.render()
+        with stage('png_compress' if output_format == 'png' else 'rasterize'):
+            code.writer.write(image, buffer)
+    return render
+
+
+def qrcode_matrix(data):
+    """Return the QR module matrix (quiet zone included) that qrcode.make() would draw."""
+    import qrcode
+
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def render_qrcode_png(data, buffer, registry):
+    # Encode straight from the module matrix; same geometry as qrcode.make() at box_size 10
+    with stage('encode'):
+        matrix = qrcode_matrix(data)
+    buffer.write(encode_matrix_png(matrix, box_size=10, compress_level=registry.png_compress_level))
+
+
+def qrcode_svg(matrix, box_size=10):
+    """Emit a QR module matrix as an SVG with one path of merged horizontal runs."""
+    size = len(matrix)
+    commands = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            run_start = x
+            while x < size and row[x]:
+                x += 1
+            run = x - run_start
+            commands.append(f"M{run_start} {y}h{run}v1h-{run}z")
+
+    pixels = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(commands)}"/></svg>'
+    ).encode('utf-8')
+
+
+def render_qrcode_svg(data, buffer, registry):
+    with stage('encode'):
+        matrix = qrcode_matrix(data)
+    with stage('rasterize'):
+        buffer.write(qrcode_svg(matrix, box_size=10))
+
+
+def build_default_registry():
+    registry = SymbologyRegistry(default='code128')
+    # Cost factors are measured render times relative to a Code128 PNG
+    registry.register('qrcode', render_qrcode_png, cost_factor=1.6)
+    registry.register('qrcode', render_qrcode_svg, output_format='svg', cost_factor=1.4)
+
+    # name: (python-barcode class, options, png cost, svg cost)
+    linear_symbologies = {
+        'code128': ('Code128', {}, 1.0, 0.5),
+        'code39': ('Code39', {'add_checksum': False}, 1.3, 0.75),
+        'ean13': ('EAN13', {}, 1.35, 0.45),
+        'ean8': ('EAN8', {}, 1.1, 0.35),
+        'upca': ('UPCA', {}, 1.15, 0.35),
+    }
+    for name, (barcode_class, barcode_kwargs, png_cost, svg_cost) in linear_symbologies.items():
+        for output_format, cost_factor in (('png', png_cost), ('svg', svg_cost)):
+            registry.register(name, linear_renderer(barcode_class, output_format, **barcode_kwargs),
+                              output_format=output_format, cost_factor=cost_factor)
+    return registry
+
+
+# Shared registry for this process; extensions register new symbologies here
+symbologies = build_default_registry()
+
+
+def register_symbology(name, renderer, output_format='png', cost_factor=1.0):
+    """Make a new symbology available to generate_barcode_image."""
+    symbologies.register(name, renderer, output_format, cost_factor)
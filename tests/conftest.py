@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def application(tmp_path_factory):
+    """The Flask app module, on a scratch database with in-memory rate limits."""
+    workdir = tmp_path_factory.mktemp('app')
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(workdir / 'test.db'))
+    os.environ.setdefault('RENDER_STORE_DIR', str(workdir / 'renders'))
+    os.environ.setdefault('JOBS_DIR', str(workdir / 'jobs'))
+    os.environ.setdefault('RATELIMIT_STORAGE_URI', 'memory://')
+    os.environ.setdefault('RENDER_CACHE_MAX_BYTES', '0')
+    os.environ.setdefault('RENDER_WARM_ON_IMPORT', 'false')
+
+    import app as application
+
+    application.app.config['WTF_CSRF_ENABLED'] = False
+    with application.app.app_context():
+        application.db.create_all()
+    return application
+
+
+@pytest.fixture
+def client(application):
+    application.limiter.reset()
+    return application.app.test_client()
@@ -0,0 +1,29 @@
+def stage_count(application, name):
+    series = application.instrumentation.stage_seconds._series.get(name)
+    return sum(series[0]) if series else 0
+
+
+def test_metrics_needs_the_token(application, client, monkeypatch):
+    assert client.get('/metrics').status_code == 403
+
+    monkeypatch.setitem(application.app.config, 'METRICS_TOKEN', 'scrape-secret')
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert 'barcode_request_seconds' in response.get_data(as_text=True)
+
+
+def test_streamed_stages_are_observed(application, client):
+    before = stage_count(application, 'encode')
+    responses = application.instrumentation._responses
+    key = ('generate_sequence', 200)
+    responses_before = responses.get(key, 0)
+
+    response = client.post('/generate_sequence', json={
+        'prefix': 'SKU-', 'count': 3, 'format': 'svg', 'response_format': 'ndjson'
+    })
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 4
+
+    assert stage_count(application, 'encode') == before + 1
+    assert responses[key] == responses_before + 1
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def jobs(application, monkeypatch):
+    app = application.app
+    with app.app_context():
+        application.ensure_job_table()
+        # Leave nothing claimable from other tests
+        application.BulkJob.query.delete()
+        application.db.session.commit()
+        yield application
+        application.db.session.rollback()
+
+
+def make_user(application, name):
+    user = application.User(username=name, email=f'{name}@example.com')
+    application.db.session.add(user)
+    application.db.session.commit()
+    return user.id
+
+
+def expire_lease(application, job_id):
+    application.BulkJob.query.filter_by(id=job_id).update({
+        'claimed_at': datetime.utcnow() - timedelta(seconds=application.app.config['JOB_LEASE_SECONDS'] + 1)
+    })
+    application.db.session.commit()
+
+
+def sequence_params(count, save_to_system=False):
+    return {'prefix': 'JOB-', 'start': 1, 'count': count, 'pad_length': 4, 'suffix': '',
+            'barcode_type': 'code128', 'format': 'svg', 'save_to_system': save_to_system}
+
+
+def test_claim_takes_each_job_once(jobs):
+    job = jobs.submit_bulk_job(sequence_params(3))
+
+    claimed = jobs.claim_next_job('worker-a')
+    assert claimed.id == job.id
+    assert claimed.status == 'running'
+    assert claimed.worker == 'worker-a'
+    assert jobs.claim_next_job('worker-b') is None
+
+
+def test_expired_lease_is_reclaimed_and_old_worker_loses_it(jobs):
+    job = jobs.submit_bulk_job(sequence_params(3))
+    jobs.claim_next_job('worker-a')
+
+    # A renewed lease keeps the job
+    jobs.update_claimed_job(job, 'worker-a', completed=1)
+    assert jobs.claim_next_job('worker-b') is None
+
+    expire_lease(jobs, job.id)
+    reclaimed = jobs.claim_next_job('worker-b')
+    assert reclaimed.id == job.id
+    assert reclaimed.worker == 'worker-b'
+
+    with pytest.raises(jobs.JobLeaseLost):
+        jobs.update_claimed_job(job, 'worker-a', completed=2)
+
+    jobs.run_bulk_job(reclaimed, 'worker-b')
+    finished = jobs.db.session.get(jobs.BulkJob, job.id)
+    assert finished.status == 'completed'
+    assert [item['index'] for item in jobs.read_job_results(finished)] == [0, 1, 2]
+
+
+def test_retried_save_job_inserts_each_member_once(jobs, monkeypatch):
+    user_id = make_user(jobs, 'job-retry')
+    job = jobs.submit_bulk_job(sequence_params(7, save_to_system=True), user_id=user_id)
+    job_id = job.id
+    monkeypatch.setattr(jobs, 'ZIP_QUERY_CHUNK_SIZE', 3)
+
+    # The first worker dies after committing one batch of three
+    insert_job_batch = jobs.insert_job_batch
+    batches = []
+
+    def crash_on_second_batch(*args, **kwargs):
+        if batches:
+            raise RuntimeError('worker died')
+        batches.append(1)
+        return insert_job_batch(*args, **kwargs)
+    monkeypatch.setattr(jobs, 'insert_job_batch', crash_on_second_batch)
+
+    with pytest.raises(RuntimeError):
+        jobs.run_bulk_job(jobs.claim_next_job('worker-a'), 'worker-a')
+    monkeypatch.setattr(jobs, 'insert_job_batch', insert_job_batch)
+    jobs.db.session.rollback()
+
+    expire_lease(jobs, job_id)
+    jobs.run_bulk_job(jobs.claim_next_job('worker-b'), 'worker-b')
+
+    rows = jobs.Barcode.query.filter_by(user_id=user_id).all()
+    assert sorted(row.data for row in rows) == [f'JOB-{number:04d}' for number in range(1, 8)]
+
+    finished = jobs.db.session.get(jobs.BulkJob, job_id)
+    assert finished.status == 'completed'
+    assert finished.completed == 7
+    results = jobs.read_job_results(finished)
+    assert [item['index'] for item in results] == list(range(7))
+    assert sorted(item['id'] for item in results) == sorted(row.id for row in rows)
+
+
+def test_lost_lease_inserts_nothing(jobs, monkeypatch):
+    user_id = make_user(jobs, 'job-lease')
+    job = jobs.submit_bulk_job(sequence_params(4, save_to_system=True), user_id=user_id)
+    claimed = jobs.claim_next_job('worker-a')
+
+    # Another worker took the job over before this one's first batch
+    jobs.BulkJob.query.filter_by(id=job.id).update({'worker': 'worker-b'})
+    jobs.db.session.commit()
+
+    with pytest.raises(jobs.JobLeaseLost):
+        jobs.run_bulk_job(claimed, 'worker-a')
+    assert jobs.Barcode.query.filter_by(user_id=user_id).count() == 0
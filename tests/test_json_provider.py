@@ -0,0 +1,19 @@
+import json
+
+from json_provider import OrjsonProvider
+
+
+def test_wide_integers_are_decoded_exactly(application):
+    provider = OrjsonProvider(application.app)
+    document = '{"data": 12345678901234567890123, "max": 18446744073709551615}'
+
+    assert provider.loads(document) == json.loads(document)
+    assert provider.loads(document.encode('utf-8'))['data'] == 12345678901234567890123
+
+
+def test_barcode_data_sent_as_a_wide_integer_keeps_its_digits(application, client):
+    response = client.post('/generate_barcode', data='{"data": 12345678901234567890123, "format": "svg"}',
+                           content_type='application/json')
+
+    assert response.status_code == 200
+    assert response.get_json()['data'] == '12345678901234567890123'
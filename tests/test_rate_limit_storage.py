@@ -0,0 +1,162 @@
+import multiprocessing
+import time
+
+import pytest
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+import rate_limit_storage
+from rate_limit_storage import FastPathRedisStorage, LocalFastPath, SQLiteCounterStorage, SQLiteStorage
+
+
+class CountingMemoryStorage(MemoryStorage):
+    """In-process storage that counts the acquire round-trips the fast path makes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.round_trips = 0
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        self.round_trips += 1
+        return super().acquire_sliding_window_entry(key, limit, expiry, amount)
+
+
+class FastPathMemoryStorage(LocalFastPath, CountingMemoryStorage):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def workers(monkeypatch):
+    # One worker unless a test says otherwise, whatever this machine's core count
+    monkeypatch.setattr(rate_limit_storage, 'FAST_PATH_WORKERS', 1)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Start mid-window so a run of hits never straddles a rollover
+    now = [6000.0 + 30]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def test_hits_are_leased_in_batches(clock):
+    storage = FastPathMemoryStorage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('100/minute')
+
+    results = [limiter.hit(limit, 'client') for _ in range(101)]
+
+    assert results == [True] * 100 + [False]
+    assert storage.round_trips <= 100 // rate_limit_storage.FAST_PATH_LEASE_HITS + 2
+    # The shared storage saw every admitted hit
+    assert storage.get_sliding_window(limit.key_for('client'), limit.get_expiry())[2] == 100
+
+
+def test_small_limits_are_not_leased(clock):
+    storage = FastPathMemoryStorage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('5/minute')
+
+    assert [limiter.hit(limit, 'client') for _ in range(6)] == [True] * 5 + [False]
+    assert storage.round_trips == 6
+
+
+def test_lease_lapses_when_its_window_ends(clock):
+    storage = FastPathMemoryStorage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('100/minute')
+
+    assert limiter.hit(limit, 'client')
+    trips = storage.round_trips
+    assert limiter.hit(limit, 'client')
+    assert storage.round_trips == trips
+
+    clock[0] += 60
+    assert limiter.hit(limit, 'client')
+    assert storage.round_trips > trips
+
+
+def test_costly_hits_pass_through_the_lease(clock):
+    storage = FastPathMemoryStorage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('100/minute')
+
+    assert limiter.hit(limit, 'client', cost=30)
+    assert limiter.hit(limit, 'client', cost=30)
+    assert limiter.hit(limit, 'client', cost=30)
+    # 90 spent; a cost-1 hit still fits, another cost-30 one does not
+    assert not limiter.hit(limit, 'client', cost=30)
+    assert limiter.hit(limit, 'client')
+
+
+def test_no_lease_without_headroom_for_every_worker(clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit_storage, 'FAST_PATH_WORKERS', 2)
+    uri = f"sqlite:///{tmp_path / 'limits.db'}"
+    first, second = SQLiteStorage(uri), SQLiteStorage(uri)
+    limit = parse('100/minute')
+    key, expiry = limit.key_for('client'), limit.get_expiry()
+
+    # 15 hits left: less than a batch of 10 for each of the 2 workers
+    assert SQLiteCounterStorage.acquire_sliding_window_entry(first, key, 100, expiry, 85)
+    assert SlidingWindowCounterRateLimiter(first).hit(limit, 'client')
+    assert first.get_sliding_window(key, expiry)[2] == 86
+
+    # The first worker holds nothing back, so the second gets every remaining hit
+    limiter = SlidingWindowCounterRateLimiter(second)
+    assert [limiter.hit(limit, 'client') for _ in range(15)] == [True] * 14 + [False]
+
+
+def test_unused_leased_hits_are_given_back(clock, tmp_path):
+    storage = SQLiteStorage(f"sqlite:///{tmp_path / 'limits.db'}")
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('100/minute')
+    key, expiry = limit.key_for('client'), limit.get_expiry()
+
+    assert limiter.hit(limit, 'client')
+    assert limiter.hit(limit, 'client')
+    window = storage.sliding_window_keys(key, expiry, clock[0])[1]
+    assert storage.get(window) == rate_limit_storage.FAST_PATH_LEASE_HITS
+
+    # The window rolls over; the next hit drops the lease and returns its 8 unused hits
+    clock[0] += 60
+    assert limiter.hit(limit, 'client')
+    assert storage.get(window) == 2
+
+
+def hit_until_rejected(uri, results):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    limit = parse('200/day')
+    admitted = 0
+    while limiter.hit(limit, 'client'):
+        admitted += 1
+    results.put(admitted)
+
+
+def test_workers_near_the_limit_admit_it_exactly(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit_storage, 'FAST_PATH_WORKERS', 4)
+    uri = f"sqlite:///{tmp_path / 'limits.db'}"
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=hit_until_rejected, args=(uri, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    admitted = [results.get(timeout=30) for _ in processes]
+    for process in processes:
+        process.join(timeout=30)
+
+    # Every hit the storage granted was handed out, and none beyond the limit
+    assert sum(admitted) == 200
+    limit = parse('200/day')
+    assert SQLiteStorage(uri).get_sliding_window(limit.key_for('client'), limit.get_expiry())[2] == 200
+
+
+def test_fastpath_redis_storage():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeStrictRedis()
+    storage = FastPathRedisStorage('fastpath+redis://localhost:6379', connection_pool=server.connection_pool)
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse('50/minute')
+
+    assert [limiter.hit(limit, 'client') for _ in range(51)] == [True] * 50 + [False]
+    assert storage.fast_path_hits > 0
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.fixture
+def small_budget(application, monkeypatch):
+    # One unit per member, against a budget far smaller than the real ones
+    monkeypatch.setattr(application.symbologies, 'cost_factor', lambda barcode_type, output_format: 1.0)
+    monkeypatch.setitem(application.RENDER_BUDGETS, 'anonymous', '40 per day, 30 per hour')
+    monkeypatch.setitem(application.RENDER_MAX_COSTS, 'anonymous', 30)
+
+
+def sequence(count):
+    return {'prefix': 'SKU-', 'count': count, 'format': 'svg'}
+
+
+def test_request_is_charged_its_full_cost(small_budget, client):
+    response = client.post('/generate_sequence', json=sequence(25))
+    assert response.status_code == 200
+    assert len(response.get_json()['barcodes']) == 25
+
+    # 5 of the hour's 30 units are left
+    assert client.post('/generate_sequence', json=sequence(6)).status_code == 429
+    assert client.post('/generate_sequence', json=sequence(5)).status_code == 200
+
+
+def test_request_larger_than_the_budget_window_is_refused(small_budget, client):
+    response = client.post('/generate_sequence', json=sequence(31))
+    assert response.status_code == 413
+    body = response.get_json()
+    assert (body['status'], body['cost'], body['max_cost']) == ('error', 31, 30)
+
+    # Refusing it spent one unit, not its cost
+    assert client.post('/generate_sequence', json=sequence(29)).status_code == 200
+    assert client.post('/generate_sequence', json=sequence(1)).status_code == 429
+
+
+def test_sequence_is_planned_once_per_request(application, client, monkeypatch):
+    calls = []
+    requested_sequence = application.requested_sequence
+
+    def counting(data, page_limit):
+        calls.append(page_limit)
+        return requested_sequence(data, page_limit)
+    monkeypatch.setattr(application, 'requested_sequence', counting)
+
+    response = client.post('/generate_sequence', json={'prefix': 'SKU-', 'count': 3})
+    assert response.status_code == 200
+    assert calls == [application.SEQUENCE_PAGE_LIMITS['generate_sequence']]
@@ -0,0 +1,36 @@
+import os
+import time
+
+from render_store import RenderStore
+
+UNIQUE_ID = '12345678-1234-4234-8234-123456789abc'
+
+
+def test_delete_only_removes_exact_unique_id(tmp_path):
+    store = RenderStore(str(tmp_path))
+    for member in ('-1', '-10', '-19', ''):
+        store.put(UNIQUE_ID + member, b'png')
+        store.put(UNIQUE_ID + member, b'svg', format='svg')
+        store.put(UNIQUE_ID + member, b'big', scale=2)
+
+    assert store.delete(UNIQUE_ID + '-1') == 3
+    assert store.get(UNIQUE_ID + '-1') is None
+    for member in ('-10', '-19', ''):
+        assert store.get(UNIQUE_ID + member) is not None
+        assert store.get(UNIQUE_ID + member, format='svg') is not None
+        assert store.get(UNIQUE_ID + member, scale=2) is not None
+
+
+def test_prune_keeps_fresh_temp_files(tmp_path):
+    store = RenderStore(str(tmp_path))
+    store.put(UNIQUE_ID, b'png')
+    shard = os.path.join(str(tmp_path), UNIQUE_ID[:2])
+    fresh = os.path.join(shard, 'tmpfresh.tmp')
+    abandoned = os.path.join(shard, 'tmpold.tmp')
+    open(fresh, 'wb').close()
+    open(abandoned, 'wb').close()
+    old = time.time() - 2 * 3600
+    os.utime(abandoned, (old, old))
+
+    assert store.prune(set()) == 2
+    assert os.listdir(shard) == ['tmpfresh.tmp']
@@ -0,0 +1,99 @@
+import pytest
+from barcode import EAN8, EAN13, UPCA
+
+from sequence_planner import SequenceSpec, check_digit, check_digits, validate_value
+
+
+@pytest.mark.parametrize('barcode_class, payloads', [
+    (EAN13, ['590123412345', '400638133393', '000000000000', '999999999999']),
+    (EAN8, ['9638507', '5512345', '0000000', '9999999']),
+    (UPCA, ['03600029145', '12345678901', '00000000000', '99999999999']),
+])
+def test_check_digits_match_python_barcode(barcode_class, payloads):
+    expected = [int(barcode_class(payload).get_fullcode()[-1]) for payload in payloads]
+    assert check_digits(int(payload) for payload in payloads) == expected
+    assert [check_digit(payload) for payload in payloads] == expected
+
+
+def test_validate_value_check_digit():
+    assert validate_value('5901234123457', 'ean13') == (True, '')
+    assert validate_value('5901234123450', 'ean13') == (False, 'Invalid EAN-13 check digit (expected 7)')
+    assert validate_value('5901234123450', 'ean13', verify_check_digit=False) == (True, '')
+    assert validate_value('96385074', 'ean8') == (True, '')
+    assert validate_value('036000291452', 'upca') == (True, '')
+    assert validate_value('036000291453', 'upca')[0] is False
+    assert validate_value('59012341234', 'ean13') == (False, 'EAN-13 must be 12 or 13 digits')
+    assert validate_value('59012341234A', 'ean13') == (False, 'EAN-13 can only contain digits')
+
+
+def test_plan_matches_member_by_member_validation():
+    # Counters 9990..10010 cross from 4 to 5 digits, so members switch from
+    # 12 to 13 characters and only the second run is check-digit verified
+    spec = SequenceSpec('59012341', 9990, 21, 0, '', 'ean13')
+    plan = spec.plan()
+    assert [index for index, _ in plan.valid][:10] == list(range(10))
+    assert plan.failures
+
+    assert plan.values == list(spec)
+    for index, value in enumerate(spec):
+        valid, error = validate_value(value, 'ean13')
+        if valid:
+            assert (index, value) in plan.valid
+        else:
+            assert {'index': index, 'data': value, 'error': error} in plan.failures
+    assert len(plan.valid) + len(plan.failures) == 21
+
+
+def test_plan_splits_runs_at_digit_width_boundary():
+    spec = SequenceSpec('A', 98, 4, 0, '', 'code128')
+    assert list(spec) == ['A98', 'A99', 'A100', 'A101']
+
+    plan = SequenceSpec('', 9999999, 2, 0, '', 'ean8').plan()
+    # 7 digits get a check digit added; the 8-digit member must carry a correct one
+    assert plan.valid == [(0, '9999999')]
+    assert plan.failures == [{'index': 1, 'data': '10000000', 'error': 'Invalid EAN-8 check digit (expected 7)'}]
+
+
+def test_negative_start():
+    spec = SequenceSpec('X', -11, 4, 0, '', 'code128')
+    assert list(spec) == ['X-11', 'X-10', 'X-9', 'X-8']
+    assert [value for _, value in spec.plan().valid] == list(spec)
+
+    plan = SequenceSpec('', -2, 3, 0, '', 'ean13').plan()
+    assert [failure['index'] for failure in plan.failures] == [0, 1]
+    assert plan.failures[0]['error'] == 'EAN-13 can only contain digits'
+    assert plan.valid == [(2, '000000000000')]
+
+
+def test_code39_charset_is_checked_once_per_sequence():
+    plan = SequenceSpec('part_', 1, 3, 0, '', 'code39').plan()
+    assert plan.valid == []
+    assert {failure['error'] for failure in plan.failures} == {'Code 39 cannot encode: _'}
+
+
+def test_stepped_slices_keep_positions():
+    spec = SequenceSpec('40063813339', 0, 10, 0, '', 'ean13')
+    page = spec[1::3]
+    assert len(page) == 3
+    assert list(page.items()) == [(1, '400638133391'), (4, '400638133394'), (7, '400638133397')]
+    assert page.plan().valid == list(page.items())
+
+    # Only 4006381333931 has the right check digit among these 13-digit members
+    full = SequenceSpec('400638133393', 0, 10, 0, '', 'ean13')
+    stepped = full[1::2].plan()
+    assert stepped.valid == [(1, '4006381333931')]
+    assert [failure['index'] for failure in stepped.failures] == [3, 5, 7, 9]
+    assert full[1:2].plan().valid == [(1, '4006381333931')]
+
+    reverse = full[::-1]
+    assert list(reverse) == list(full)[::-1]
+    assert reverse.plan().valid == [(1, '4006381333931')]
+    assert [failure['index'] for failure in reverse.plan().failures] == [9, 8, 7, 6, 5, 4, 3, 2, 0]
+
+
+def test_generate_barcode_keeps_accepting_a_wrong_check_digit(client):
+    response = client.post('/generate_barcode', json={'data': '5901234123450', 'barcode_type': 'ean13'})
+    assert response.status_code == 200
+
+    response = client.post('/generate_barcode', json={'data': '59012341234A', 'barcode_type': 'ean13'})
+    assert response.status_code == 400
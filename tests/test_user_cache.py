@@ -0,0 +1,61 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def user_id(application):
+    name = f'cached-{uuid.uuid4().hex[:8]}'
+    with application.app.app_context():
+        user = application.User(username=name, email=f'{name}@example.com')
+        application.db.session.add(user)
+        application.db.session.commit()
+        return user.id
+
+
+def load(application, user_id):
+    """Load the user the way a fresh request does, returning a snapshot of it."""
+    with application.app.test_request_context('/'):
+        user = application.load_user(str(user_id))
+        if user is None:
+            return None
+        return {'is_premium': user.is_premium, 'encryption_key': user.encryption_key}
+
+
+def change(application, user_id, **values):
+    with application.app.app_context():
+        user = application.db.session.get(application.User, user_id)
+        for name, value in values.items():
+            setattr(user, name, value)
+        application.db.session.commit()
+
+
+def test_premium_upgrade_is_seen_by_the_next_request(application, user_id):
+    assert load(application, user_id)['is_premium'] is False
+    assert user_id in application.user_cache
+
+    change(application, user_id, is_premium=True)
+
+    assert user_id not in application.user_cache
+    assert load(application, user_id)['is_premium'] is True
+
+
+def test_new_encryption_key_is_seen_by_the_next_request(application, user_id):
+    change(application, user_id, encryption_key='old-key')
+    assert load(application, user_id)['encryption_key'] == 'old-key'
+
+    change(application, user_id, encryption_key='new-key')
+
+    assert load(application, user_id)['encryption_key'] == 'new-key'
+
+
+def test_deleted_user_is_not_served_from_the_cache(application, user_id):
+    assert load(application, user_id) is not None
+    assert user_id in application.user_cache
+
+    with application.app.app_context():
+        application.db.session.delete(application.db.session.get(application.User, user_id))
+        application.db.session.commit()
+
+    assert user_id not in application.user_cache
+    assert load(application, user_id) is None
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from write_queue import GroupCommitWriter
+
+metadata = MetaData()
+items = Table('item', metadata, Column('id', Integer, primary_key=True), Column('name', String(20), unique=True))
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writes.db'}")
+    metadata.create_all(engine)
+    commits = []
+    event.listen(engine, 'commit', lambda connection: commits.append(1))
+    engine.commits = commits
+    return engine
+
+
+def names(engine):
+    with engine.connect() as connection:
+        return sorted(connection.execute(select(items.c.name)).scalars())
+
+
+def test_writes_submitted_together_share_one_commit(engine):
+    # max_batch is reached before max_delay, so the group is exactly these writes
+    writer = GroupCommitWriter(engine, max_batch=4, max_delay=5)
+    statement = insert(items).returning(items.c.id, sort_by_parameter_order=True)
+    futures = [writer.submit(statement, [{'name': f'item-{i}'}]) for i in range(4)]
+
+    ids = [future.result(timeout=5) for future in futures]
+
+    assert sorted(id for result in ids for id in result) == [1, 2, 3, 4]
+    assert writer.stats() == {'batches': 1, 'writes': 4, 'avg_batch_size': 4.0}
+    assert len(engine.commits) == 1
+    assert names(engine) == ['item-0', 'item-1', 'item-2', 'item-3']
+
+
+def test_failed_group_is_retried_write_by_write(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(items), [{'name': 'taken'}])
+    engine.commits.clear()
+
+    writer = GroupCommitWriter(engine, max_batch=3, max_delay=5)
+    statement = insert(items)
+    first = writer.submit(statement, [{'name': 'first'}])
+    duplicate = writer.submit(statement, [{'name': 'taken'}])
+    last = writer.submit(statement, [{'name': 'last'}])
+
+    # The neighbours of the bad write are committed on their own
+    assert first.result(timeout=5) == 1
+    assert last.result(timeout=5) == 1
+    with pytest.raises(IntegrityError):
+        duplicate.result(timeout=5)
+    assert names(engine) == ['first', 'last', 'taken']
+    assert len(engine.commits) == 2
+
+
+def test_write_error_is_raised_from_its_future(engine):
+    writer = GroupCommitWriter(engine, max_batch=1, max_delay=0)
+    writer.execute(insert(items), [{'name': 'once'}], timeout=5)
+
+    with pytest.raises(IntegrityError):
+        writer.execute(insert(items), [{'name': 'once'}], timeout=5)
+
+    # The writer thread survives the failure and keeps serving writes
+    assert writer.execute(insert(items), [{'name': 'twice'}], timeout=5) == 1
+    assert names(engine) == ['once', 'twice']
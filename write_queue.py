@@ -0,0 +1,98 @@
+"""Single-writer queue that group-commits inserts from many request threads."""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class GroupCommitWriter:
+    """Funnel writes from every thread of a process through one writer thread.
+
+    Requests submit (statement, rows) and get a Future back. The writer
+    collects whatever arrives within max_delay (up to max_batch writes) and
+    runs it in one transaction, so many small saves share one write lock
+    and one fsync instead of queueing for the SQLite lock one by one.
+    """
+
+    def __init__(self, engine, max_batch=256, max_delay=0.002):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.writes = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                                name='group-commit-writer', daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def submit(self, statement, rows):
+        """Queue an executemany of statement over rows; the Future resolves after commit.
+
+        The result is the list of returned scalars for statements with
+        RETURNING, otherwise the row count.
+        """
+        future = Future()
+        self._ensure_started().put((statement, rows, future))
+        return future
+
+    def execute(self, statement, rows, timeout=None):
+        return self.submit(statement, rows).result(timeout)
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(pending.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            writes = [write for write in batch if write[2].set_running_or_notify_cancel()]
+            if writes:
+                self._commit(writes)
+
+    def _commit(self, writes):
+        try:
+            results = self._execute(writes)
+        except Exception:
+            # One bad write must not fail its neighbours: retry each on its own
+            for write in writes:
+                try:
+                    results = self._execute([write])
+                except Exception as e:
+                    write[2].set_exception(e)
+                else:
+                    write[2].set_result(results[0])
+            return
+
+        self.batches += 1
+        self.writes += len(writes)
+        for (_, _, future), result in zip(writes, results):
+            future.set_result(result)
+
+    def _execute(self, writes):
+        results = []
+        with self.engine.begin() as connection:
+            for statement, rows, _ in writes:
+                result = connection.execute(statement, rows)
+                results.append(result.scalars().all() if result.returns_rows else result.rowcount)
+        return results
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'writes': self.writes,
+            'avg_batch_size': round(self.writes / self.batches, 2) if self.batches else 0.0,
+        }
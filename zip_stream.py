@@ -0,0 +1,72 @@
+"""Incremental ZIP writer that yields archive bytes as entries are added."""
+import io
+import time
+import zipfile
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file object that collects bytes until drained.
+
+    Because it can't seek, zipfile writes a data descriptor after each entry
+    instead of going back to patch the local header.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Yield a ZIP archive built from (name, bytes) pairs, one entry at a time.
+
+    Entries are stored uncompressed because PNG data is already compressed.
+    Only the entry being written (plus the central directory index) is held
+    in memory; ZIP64 records are added automatically for huge archives.
+    """
+    sink = _ChunkSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def compress_id_ranges(ids):
+    """Collapse a list of integer ids into sorted [start, end] ranges."""
+    ranges = []
+    for value in sorted(set(ids)):
+        if ranges and value == ranges[-1][1] + 1:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+    return ranges
+
+
+def expand_id_ranges(ranges):
+    """Yield every id covered by [start, end] ranges."""
+    for start, end in ranges:
+        yield from range(int(start), int(end) + 1)